@@ -0,0 +1,67 @@
+import os
+import sys
+import argparse
+import subprocess
+
+PIPELINE = ["discover", "crawl", "preprocess", "ingest", "rhymes"]
+
+
+def parse_args():
+    # --force is accepted after the subcommand too: `python -m src all --force`
+    force_parser = argparse.ArgumentParser(add_help=False)
+    force_parser.add_argument("--force", action="store_true", default=argparse.SUPPRESS, help="runs the stages even when they are up to date")
+
+    parser = argparse.ArgumentParser(prog="python -m src", description="French rap lyrics pipeline and ghost writer.", parents=[force_parser])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("discover", parents=[force_parser], help="finds the french rap artists on Spotify and saves them in main.yml")
+    subparsers.add_parser("crawl", parents=[force_parser], help="fetches the artists lyrics from Genius")
+    subparsers.add_parser("preprocess", parents=[force_parser], help="enriches the lyrics with metadata (counts, emotion, common words)")
+    subparsers.add_parser("ingest", parents=[force_parser], help="vectorizes the lyrics into the Qdrant collection")
+    subparsers.add_parser("rhymes", parents=[force_parser], help="builds the rhyme index of the line-final words")
+    serve_parser = subparsers.add_parser("serve", parents=[force_parser], help="starts the inference server")
+    serve_parser.add_argument("--with-app", action="store_true", help="also starts the streamlit app")
+    subparsers.add_parser("all", parents=[force_parser], help=f"runs {', '.join(PIPELINE)}, skipping the up to date stages")
+
+    args = parser.parse_args()
+    args.force = getattr(args, "force", False)
+    return args
+
+
+def main():
+    """
+    Single entry point of the project: `python -m src <command>`.
+
+    The heavy modules (torch, transformers, langchain, spacy...) are only imported by the
+    stages that run, the configuration is parsed once and shared by the stages, and the
+    cacheable stages are skipped when their inputs, configuration sections and code did not
+    change since their last recorded run (see src/utils/stage_runner.py).
+    """
+    args = parse_args()
+
+    from src.paths import PARENT_DIR
+    from src.utils.file_utils import get_config
+    from src.utils.stage_runner import STAGES, run_stage
+
+    CONFIG = get_config("main.yml")
+    stages = {stage.name: stage for stage in STAGES}
+
+    if args.command == "all":
+        for name in PIPELINE:
+            run_stage(stages[name], CONFIG, args.force)
+        return
+
+    app_process = None
+    if args.command == "serve" and args.with_app:
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(PARENT_DIR), os.environ.get("PYTHONPATH")]))}
+        app_process = subprocess.Popen([sys.executable, "-m", "streamlit", "run", str(PARENT_DIR / "src" / "app" / "app.py")], env=env)
+
+    try:
+        run_stage(stages[args.command], CONFIG, args.force)
+    finally:
+        if app_process is not None:
+            app_process.terminate()
+
+
+if __name__ == "__main__":
+    main()
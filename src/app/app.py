@@ -1,9 +1,8 @@
-import time
 import streamlit as st
 
 from src.utils.file_utils import get_config
 from src.utils.logger import get_console_logger
-from utils.app_utils import get_prompt_template, get_llm, create_retriever, response_generator
+from src.app.utils.app_utils import response_generator, get_rhyme_suggestions
 
 logger = get_console_logger()
 
@@ -13,28 +12,21 @@ def main():
     Main script to launch the app.
     
     The script performs the following operations:
-    - Loads the LLM, retriever and prompt template.
     - Creates the streamlit app with a chat
-    - Creates a text splittre and apply it on the data
-    - Vectorizes and saves the data into the Qdrant DataBase
+    - Shows the rhymes found in the lyrics right away for the rhyme queries
+      (e.g. "rimes en -ouille pour Jul")
+    - Sends each prompt to the local inference server (see main_inference_server.py), which
+      retrieves the context and batches the generation with the other users' prompts
+    - Streams the generated answer back into the chat
     
     Configuration for the script, including file paths and processing parameters, 
     is loaded from a 'main.yml' file.
     
     Returns:
-        No
+        None
     """
     CONFIG = get_config("main.yml")
     
-    llm = get_llm(CONFIG)
-    logger.info("LLM set")
-    
-    retriever = create_retriever(CONFIG)
-    logger.info("Retriever set")
-    
-    prompt_template = get_prompt_template(CONFIG)
-    logger.info("Prompt Template set")
-    
     st.title("Ghost Writer Chat")
 
     if "messages" not in st.session_state:
@@ -51,7 +43,12 @@ def main():
             st.markdown(prompt)
 
         with st.chat_message("assistant"):
-            response = st.write_stream(response_generator(prompt, llm, retriever, prompt_template))
+            rhyme_suggestions = get_rhyme_suggestions(prompt, CONFIG)
+            if rhyme_suggestions:
+                st.markdown(rhyme_suggestions)
+            response = st.write_stream(response_generator(prompt, CONFIG))
+            if rhyme_suggestions:
+                response = f"{rhyme_suggestions}\n\n{response}"
         
         st.session_state.messages.append({"role": "assistant", "content": response})
     
@@ -0,0 +1,82 @@
+import os
+import time
+
+import torch
+
+from src.paths import DATA_DIR
+from src.utils.logger import get_console_logger
+from src.utils.file_utils import get_config, write_json_file
+from src.benchmarks.utils.benchmark_utils import get_peak_rss_mb
+from src.inference_server.utils.model_utils import get_model_and_tokenizer, get_model_name
+
+logger = get_console_logger()
+
+def main():
+    """
+    Benchmarks the ghost-writer model with the configured backend, to size the deployments.
+    
+    The script performs the following operations:
+    - Loads the model and tokenizer with the 'model' configuration (backend, quantization,
+      threads, small model option) and measures the load time.
+    - Runs a warm-up generation, then `nb_runs` greedy generations of exactly `max_new_tokens`
+      tokens and measures the tokens per second.
+    - Reports the load time, tokens per second and peak RSS of the process, and saves them
+      to a JSON file.
+    
+    Configuration for the script, including the prompt and the number of runs, 
+    is loaded from a 'main.yml' file.
+    
+    Returns:
+        None
+    """
+    CONFIG = get_config("main.yml")
+    prompt         = CONFIG["benchmark"]["inference"]["prompt"]
+    max_new_tokens = CONFIG["benchmark"]["inference"]["max_new_tokens"]
+    nb_runs        = CONFIG["benchmark"]["inference"]["nb_runs"]
+    save_path      = CONFIG["benchmark"]["inference"]["save_path"]
+
+    start = time.perf_counter()
+    model, tokenizer = get_model_and_tokenizer(CONFIG)
+    load_time = time.perf_counter() - start
+    logger.info(f"Model loaded in {load_time:.2f}s")
+
+    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+    generation_kwargs = {
+        "max_new_tokens": max_new_tokens,
+        "min_new_tokens": max_new_tokens,
+        "do_sample": False,
+        "pad_token_id": tokenizer.pad_token_id,
+    }
+
+    with torch.inference_mode():
+        model.generate(**inputs, **generation_kwargs)
+
+        runs_tokens_per_second = []
+        for run in range(nb_runs):
+            start = time.perf_counter()
+            outputs = model.generate(**inputs, **generation_kwargs)
+            duration = time.perf_counter() - start
+            nb_new_tokens = outputs.shape[-1] - inputs["input_ids"].shape[-1]
+            runs_tokens_per_second.append(nb_new_tokens / duration)
+            logger.info(f"Run {run + 1}/{nb_runs}: {nb_new_tokens / duration:.2f} tokens/s")
+
+    results = {
+        "model_name": get_model_name(CONFIG),
+        "backend": CONFIG["model"]["backend"],
+        "cpu_quantization": CONFIG["model"]["cpu"]["quantization"] if CONFIG["model"]["backend"] == "cpu" else None,
+        "num_threads": torch.get_num_threads(),
+        "prompt_tokens": inputs["input_ids"].shape[-1],
+        "max_new_tokens": max_new_tokens,
+        "load_time_s": load_time,
+        "tokens_per_second": sum(runs_tokens_per_second) / len(runs_tokens_per_second),
+        "runs_tokens_per_second": runs_tokens_per_second,
+        "peak_rss_mb": get_peak_rss_mb(),
+    }
+    logger.info(f"Load time {results['load_time_s']:.2f}s, {results['tokens_per_second']:.2f} tokens/s, peak RSS {results['peak_rss_mb']:.0f}MB")
+
+    os.makedirs((DATA_DIR / save_path).parent, exist_ok=True)
+    write_json_file(results, DATA_DIR / save_path)
+    logger.info(f"Benchmark results saved to {DATA_DIR / save_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import argparse
+import tempfile
+
+import spotipy
+import pandas as pd
+from langchain_community.vectorstores import Qdrant
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from src.paths import DATA_DIR
+from src.utils.logger import get_console_logger
+from src.utils.file_utils import get_config, read_songs_json_files, write_json_file, get_safe_file_name, get_artists_names_mapping
+from src.data_crawler.utils.artists_names_utils import search_french_rap_playlists, get_playlists_tracks, get_artists_ids_from_tracks
+from src.data_crawler.utils.lyrics_utils import get_artists_ids, get_artist_songs_url, get_song_lyrics, extract_verse_refrain
+from src.data_preprocessing.utils.metadata_utils import add_int_data, clean_lyrics, get_most_frequent_emotion
+from src.data_ingestion.utils.ingest_utils import create_lyrics_documents
+from src.inference_server.utils.retrieval_utils import retrieve_documents, get_context, build_prompt, get_prompt_template, get_prompt_prefixes
+from src.inference_server.utils.batching_utils import GenerationRequest, generate_batch, get_prefix_lengths
+from src.inference_server.utils.kv_cache_utils import PrefixKVCache
+from src.rhyme_index.utils.rhyme_index_utils import RhymeIndex, get_rhyme_entries, write_rhyme_index
+from src.benchmarks.utils.benchmark_utils import run_stage, compare_results, get_peak_rss_mb
+from src.benchmarks.utils.corpus_utils import get_vocabulary, generate_corpus, to_crawler_format
+from src.benchmarks.utils.standins_utils import FixturesServer, HashingEmbeddings, ByteTokenizer, get_tiny_llm
+
+logger = get_console_logger()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the pipeline stages.")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the number of songs per artist of the synthetic corpus")
+    parser.add_argument("--save-baseline", action="store_true", help="saves the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compares the results with the saved baseline and fails on regressions")
+    return parser.parse_args()
+
+def main():
+    """
+    Offline end-to-end benchmark of the pipeline, without network nor outside services.
+
+    The script performs the following operations:
+    - Generates a synthetic French lyrics corpus at the configured scale.
+    - Serves recorded Genius API/HTML and Spotify responses, filled with the corpus, from a
+      local stand-in server.
+    - Times each stage and measures its throughput and peak RSS: playlists discovery, artists
+      and songs lookup, `get_song_lyrics` fetching and parsing, `extract_verse_refrain`,
+      `read_songs_json_files`, `clean_lyrics`, emotion scoring, chunking, ingestion in an
+      in-memory Qdrant with tiny stand-in embeddings, filtered retrieval, the rhyme index build
+      and queries, and batched generation with a tiny stand-in LLM, with and without the
+      prefix KV cache.
+    - Saves the results to a JSON file and, in compare mode, flags the regressions against
+      the saved baseline.
+
+    Configuration for the script, including the corpus size and the regression threshold,
+    is loaded from a 'main.yml' file.
+
+    Returns:
+        None
+    """
+    args = parse_args()
+
+    CONFIG = get_config("main.yml")
+    bench_config = CONFIG["benchmark"]["pipeline"]
+    emotions     = CONFIG["preprocessor"]["emotions"]
+    nb_artists   = bench_config["nb_artists"]
+    nb_songs     = max(1, int(bench_config["nb_songs_per_artist"] * args.scale))
+    seed         = bench_config["seed"]
+
+    vocabulary = get_vocabulary(DATA_DIR / CONFIG["preprocessor"]["emotions_csv_path"], bench_config["nb_lexicon_words"], seed)
+    corpus = generate_corpus(CONFIG["artists"]["names"], nb_artists, nb_songs, vocabulary, bench_config["words_per_line"], seed)
+    nb_songs_total = nb_artists * nb_songs
+    logger.info(f"Synthetic corpus: {nb_artists} artists, {nb_songs_total} songs")
+
+    stages = {}
+
+    with FixturesServer(corpus, DATA_DIR / bench_config["fixtures_dir"], bench_config["nb_playlists"]) as server, tempfile.TemporaryDirectory() as lyrics_dir:
+        sp = spotipy.Spotify(auth="offline-benchmark")
+        sp.prefix = f"{server.url}/v1/"
+
+        tracks = run_stage(
+            stages, "spotify_discovery",
+            lambda: get_playlists_tracks(sp, search_french_rap_playlists(sp, CONFIG["spotipy"]["query"], CONFIG["spotipy"]["type"], CONFIG["spotipy"]["offsets"], CONFIG["spotipy"]["limit"])),
+            lambda tracks: len(tracks), "tracks",
+        )
+        get_artists_ids_from_tracks(tracks)
+
+        def lookup_songs():
+            artists_ids = get_artists_ids(server.url, {}, list(corpus))
+            return {artist_name: get_artist_songs_url(server.url, {}, artist_id) for artist_id, artist_name in artists_ids.items()}
+
+        songs_urls = run_stage(stages, "genius_songs_lookup", lookup_songs, nb_artists, "artists")
+
+        def fetch_lyrics():
+            return {artist_name: get_song_lyrics(server.url, song_urls, 0, 0) for artist_name, song_urls in songs_urls.items()}
+
+        crawled = run_stage(stages, "get_song_lyrics", fetch_lyrics, nb_songs_total, "songs")
+        all_lyrics = [song["lyrics"] for artist_lyrics in crawled.values() for song in artist_lyrics.values()]
+
+        run_stage(stages, "extract_verse_refrain", lambda: [extract_verse_refrain(lyrics) for lyrics in all_lyrics], len(all_lyrics), "songs")
+
+        for artist_name, artist_songs in corpus.items():
+            write_json_file(to_crawler_format(artist_songs), os.path.join(lyrics_dir, f"{get_safe_file_name(artist_name)}.json"))
+
+        songs_data = run_stage(stages, "read_songs_json_files", lambda: read_songs_json_files(lyrics_dir), nb_songs_total, "songs")
+
+    df = pd.DataFrame(songs_data)
+    df['lyrics'] = df['lyrics'].astype("string")
+    df = add_int_data(df)
+
+    df = run_stage(stages, "clean_lyrics", lambda: clean_lyrics(df), len(df), "songs")
+
+    lexicon_df = pd.read_csv(DATA_DIR / CONFIG["preprocessor"]["emotions_csv_path"], delimiter=';').drop_duplicates(subset='word')
+    emotion_dict = lexicon_df.set_index('word')[emotions].to_dict()
+    df['main_sentiment'] = run_stage(
+        stages, "emotion_scoring",
+        lambda: df["lemma_str"].apply(lambda x: get_most_frequent_emotion(x, emotion_dict)),
+        len(df), "songs",
+    )
+
+    songs_sentiments = {(artist, song): sentiment for artist, song, sentiment in df[["artist_name", "song_name", "main_sentiment"]].itertuples(index=False)}
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CONFIG["qdrant"]["chunk_size"], chunk_overlap=CONFIG["qdrant"]["chunk_overlap"])
+    texts = run_stage(
+        stages, "chunking",
+        lambda: text_splitter.split_documents(create_lyrics_documents(songs_data, get_artists_names_mapping(CONFIG["artists"]["names"]), songs_sentiments)),
+        lambda texts: len(texts), "chunks",
+    )
+
+    embeddings = HashingEmbeddings(bench_config["embeddings_size"])
+    db = run_stage(
+        stages, "ingestion",
+        lambda: Qdrant.from_documents(texts, embeddings, location=":memory:", collection_name=CONFIG["qdrant"]["collection_name"]),
+        len(texts), "chunks",
+    )
+
+    queries = [f"Écris un couplet {emotion} comme {artist_name}" for artist_name, emotion in zip(list(corpus), emotions * nb_artists)]
+    retrieved = run_stage(stages, "retrieval", lambda: [retrieve_documents(db, CONFIG, query) for query in queries], len(queries), "queries")
+
+    with tempfile.TemporaryDirectory() as rhyme_dir:
+        rhyme_index_path = os.path.join(rhyme_dir, "rhyme_index.bin")
+        entries = run_stage(stages, "rhyme_index_build", lambda: get_rhyme_entries(songs_data, get_artists_names_mapping(CONFIG["artists"]["names"])), nb_songs_total, "songs")
+        write_rhyme_index(entries, rhyme_index_path)
+
+        rhyme_index = RhymeIndex(rhyme_index_path)
+        targets = [(word, [artist_name]) for artist_name, word in zip(list(corpus), vocabulary)]
+        run_stage(
+            stages, "rhyme_index_query",
+            lambda: [rhyme_index.query(word, artists, CONFIG["rhyme_index"]["max_words"], CONFIG["rhyme_index"]["max_examples"]) for word, artists in targets],
+            len(targets), "queries",
+        )
+        rhyme_index.close()
+
+    prompt_template = get_prompt_template(CONFIG)
+    tokenizer = ByteTokenizer()
+    model = get_tiny_llm(tokenizer.vocab_size, seed)
+    generation_params = {**CONFIG["model"], "max_new_tokens": bench_config["max_new_tokens"], "do_sample": False}
+    batch_queries = queries[:bench_config["batch_size"]]
+    batch_documents = retrieved[:bench_config["batch_size"]]
+
+    def generate(kv_cache=None):
+        requests = []
+        for query, documents in zip(batch_queries, batch_documents):
+            context = get_context(documents)
+            encoding = tokenizer(build_prompt(query, context, prompt_template), return_offsets_mapping=True)
+            prefix_lengths = get_prefix_lengths(encoding["offset_mapping"], get_prompt_prefixes(context, prompt_template, cache_context=True))
+            requests.append(GenerationRequest(encoding["input_ids"], generation_params["max_new_tokens"], prefix_lengths))
+        generate_batch(model, tokenizer, requests, generation_params, kv_cache=kv_cache)
+        return requests
+
+    count_tokens = lambda requests: sum(request.nb_generated_tokens for request in requests)
+    run_stage(stages, "generation", generate, count_tokens, "tokens")
+
+    kv_cache = PrefixKVCache(bench_config["kv_cache_max_memory_mb"])
+    run_stage(stages, "generation_kv_cache_cold", lambda: generate(kv_cache), count_tokens, "tokens")
+    run_stage(stages, "generation_kv_cache_warm", lambda: generate(kv_cache), count_tokens, "tokens")
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "corpus": {"nb_artists": nb_artists, "nb_songs_per_artist": nb_songs, "seed": seed},
+        "peak_rss_mb": get_peak_rss_mb(),
+        "stages": stages,
+    }
+
+    save_path = DATA_DIR / bench_config["save_path"]
+    os.makedirs(save_path.parent, exist_ok=True)
+    write_json_file(results, save_path)
+    logger.info(f"Benchmark results saved to {save_path}")
+
+    baseline_path = DATA_DIR / bench_config["baseline_path"]
+    if args.save_baseline:
+        write_json_file(results, baseline_path)
+        logger.info(f"Baseline saved to {baseline_path}")
+
+    if args.compare:
+        if not baseline_path.exists():
+            raise SystemExit(f"No baseline at {baseline_path}, run the benchmark with --save-baseline first")
+
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        if baseline["corpus"] != results["corpus"]:
+            raise SystemExit(
+                f"The baseline corpus {baseline['corpus']} differs from the current corpus {results['corpus']}, "
+                "run the benchmark with the same --scale and configuration or save a new baseline"
+            )
+
+        regressions = compare_results(results, baseline, bench_config["regression_threshold"], bench_config["min_duration_delta_s"])
+        for regression in regressions:
+            logger.info(f"REGRESSION {regression['stage']} {regression['metric']}: {regression['baseline']:.3f} -> {regression['current']:.3f} ({regression['change']:+.1%})")
+
+        if regressions:
+            raise SystemExit(1)
+        logger.info("No regression against the baseline")
+
+if __name__ == "__main__":
+    main()
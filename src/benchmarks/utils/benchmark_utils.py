@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import resource
+import threading
+from typing import List, Dict, Callable
+
+from src.utils.logger import get_console_logger
+
+logger = get_console_logger()
+
+
+def get_peak_rss_mb() -> float:
+    """Returns the peak resident set size of the current process in MB."""
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak_rss / 1024 ** 2
+    return peak_rss / 1024
+
+
+def get_current_rss_mb() -> float:
+    """Returns the current resident set size of the process in MB, the peak one when /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError):
+        return get_peak_rss_mb()
+
+
+class PeakRSSSampler:
+    """Samples the resident set size in a background thread and keeps the peak value."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, get_current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_mb = get_current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, get_current_rss_mb())
+
+
+def run_stage(stages: Dict, name: str, func: Callable, nb_items, unit: str):
+    """Runs a benchmark stage and records its duration, throughput and peak RSS.
+
+    Args:
+    stages (dict): the stages results, updated with the stage record.
+    name (str): the stage name.
+    func (callable): the stage, called without arguments.
+    nb_items (int or callable): the number of processed items, or a function computing it from the stage output.
+    unit (str): the processed items unit, e.g. songs.
+
+    Returns:
+    the stage output.
+    """
+    with PeakRSSSampler() as sampler:
+        start = time.perf_counter()
+        output = func()
+        duration = time.perf_counter() - start
+
+    nb_items = nb_items(output) if callable(nb_items) else nb_items
+    stages[name] = {
+        "duration_s": duration,
+        "items": nb_items,
+        "unit": unit,
+        "throughput": nb_items / duration if duration > 0 else None,
+        "peak_rss_mb": sampler.peak_mb,
+    }
+    logger.info(f"{name}: {duration:.3f}s, {nb_items} {unit} ({stages[name]['throughput'] or 0:.1f} {unit}/s), peak RSS {sampler.peak_mb:.0f}MB")
+
+    return output
+
+
+def compare_results(results: Dict, baseline: Dict, threshold: float, min_duration_delta_s: float) -> List[Dict]:
+    """Compares the stages durations and peak RSS with a saved baseline.
+
+    A stage regresses when a metric grows by more than `threshold` (relative), durations also
+    have to grow by more than `min_duration_delta_s` to ignore the noise of the fastest stages.
+
+    Args:
+    results (dict): the current benchmark results.
+    baseline (dict): the baseline benchmark results.
+    threshold (float): the relative growth tolerated, e.g. 0.2 for 20%.
+    min_duration_delta_s (float): the absolute duration growth tolerated.
+
+    Returns:
+    list of dict: the regressions, with the stage, metric, baseline and current values.
+    """
+    regressions = []
+
+    for name, stage in results["stages"].items():
+        baseline_stage = baseline["stages"].get(name)
+        if baseline_stage is None:
+            logger.info(f"{name}: not in the baseline")
+            continue
+
+        for metric in ["duration_s", "peak_rss_mb"]:
+            current, previous = stage[metric], baseline_stage[metric]
+            change = (current - previous) / previous if previous else 0.0
+            logger.info(f"{name} {metric}: {previous:.3f} -> {current:.3f} ({change:+.1%})")
+
+            if change > threshold and (metric != "duration_s" or current - previous > min_duration_delta_s):
+                regressions.append({"stage": name, "metric": metric, "baseline": previous, "current": current, "change": change})
+
+    return regressions
@@ -0,0 +1,91 @@
+import random as rd
+from typing import List, Dict
+
+import pandas as pd
+
+from src.data_crawler.utils.lyrics_utils import extract_verse_refrain
+
+RAP_WORDS = [
+    "quartier", "bitume", "hall", "béton", "cité", "frérot", "khey", "wesh", "gamos", "oseille",
+    "billets", "nuit", "rue", "tieks", "mic", "flow", "rime", "couplet", "street", "zone",
+    "banlieue", "guetto", "daron", "daronne", "reuf", "re-noi", "sapé", "ient-cli", "binks", "bolide",
+]
+
+SECTIONS_LAYOUT = [("Intro", 4), ("Couplet 1", 16), ("Refrain", 8), ("Couplet 2", 16), ("Refrain", 8), ("Outro", 4)]
+
+def get_vocabulary(emotions_csv_path: str, nb_lexicon_words: int, seed: int) -> List[str]:
+    """Builds the corpus vocabulary from the FEEL lexicon single words and common rap words,
+    so that the emotion scoring finds matches in the synthetic lyrics.
+
+    Args:
+    emotions_csv_path (str): path to the FEEL lexicon.
+    nb_lexicon_words (int): number of lexicon words to sample.
+    seed (int): the random seed.
+
+    Returns:
+    list of str: the vocabulary.
+    """
+    lexicon_df = pd.read_csv(emotions_csv_path, delimiter=';')
+    words = sorted({word for word in lexicon_df["word"].dropna() if " " not in word})
+
+    return rd.Random(seed).sample(words, min(nb_lexicon_words, len(words))) + RAP_WORDS
+
+def generate_song_lyrics(rng: rd.Random, vocabulary: List[str], words_per_line: int) -> str:
+    """Generates Genius-like lyrics, with section tags and rhyming line endings."""
+    sections = []
+
+    for section_name, nb_lines in SECTIONS_LAYOUT:
+        rhyme_words = rng.sample(vocabulary, 2)
+        lines = [
+            " ".join(rng.choices(vocabulary, k=words_per_line - 1) + [rhyme_words[(line // 2) % 2]]).capitalize()
+            for line in range(nb_lines)
+        ]
+        sections.append(f"[{section_name}]\n" + "\n".join(lines))
+
+    return "\n\n".join(sections)
+
+def generate_corpus(artists_names: List[str], nb_artists: int, nb_songs_per_artist: int, vocabulary: List[str], words_per_line: int, seed: int) -> Dict[str, Dict[str, str]]:
+    """Generates a synthetic French lyrics corpus.
+
+    Args:
+    artists_names (list of str): the artists names, cycled through when nb_artists is larger.
+    nb_artists (int): number of artists.
+    nb_songs_per_artist (int): number of songs per artist.
+    vocabulary (list of str): the words to draw from, see get_vocabulary.
+    words_per_line (int): number of words per lyrics line.
+    seed (int): the random seed.
+
+    Returns:
+    dict: A dict with the artist name as key and a dict of song name to lyrics as value.
+    """
+    rng = rd.Random(seed)
+    corpus = {}
+
+    for artist_idx in range(nb_artists):
+        artist_name = artists_names[artist_idx % len(artists_names)]
+        if artist_idx >= len(artists_names):
+            artist_name = f"{artist_name} {artist_idx // len(artists_names)}"
+
+        corpus[artist_name] = {
+            f"{rng.choice(vocabulary).capitalize()} {song_idx}": generate_song_lyrics(rng, vocabulary, words_per_line)
+            for song_idx in range(nb_songs_per_artist)
+        }
+
+    return corpus
+
+def to_crawler_format(artist_songs: Dict[str, str]) -> Dict[str, Dict]:
+    """Formats the songs of an artist the way get_song_lyrics saves them."""
+    artist_lyrics = {}
+
+    for song_name, lyrics in artist_songs.items():
+        intro, pre_chorus, verses, chorus, outro = extract_verse_refrain(lyrics)
+        artist_lyrics[song_name] = {
+            "lyrics": lyrics,
+            "intro": intro,
+            "verses": verses,
+            "pre_chorus": pre_chorus,
+            "chorus": chorus,
+            "outro": outro,
+        }
+
+    return artist_lyrics
@@ -0,0 +1,209 @@
+import re
+import copy
+import json
+import html
+import math
+import zlib
+import threading
+from pathlib import Path
+from typing import List, Dict
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import torch
+from langchain_core.embeddings import Embeddings
+from transformers import MistralConfig, AutoModelForCausalLM
+
+
+class FixturesServer:
+    """Local stand-in for the Genius API, the Genius song pages and the Spotify API.
+
+    The responses are the recorded fixtures in `fixtures_dir`, filled with the synthetic corpus:
+    - GET /search/?q=<artist>: Genius search, one song hit for the artist.
+    - GET /artists/<id>/songs?page=<n>&per_page=<n>: Genius artist songs, paginated.
+    - GET /songs/<id>/<idx>: Genius song page with the lyrics.
+    - GET /v1/search?offset=<n>: Spotify playlists search.
+    - GET /v1/playlists/<id>/tracks: Spotify playlist tracks, one per artist.
+    """
+
+    def __init__(self, corpus: Dict[str, Dict[str, str]], fixtures_dir: Path, nb_playlists: int):
+        self.artists = list(corpus)
+        self.songs = [list(artist_songs.items()) for artist_songs in corpus.values()]
+        self.nb_playlists = nb_playlists
+
+        self.genius_search = json.loads((fixtures_dir / "genius_search.json").read_text(encoding="utf-8"))
+        self.genius_artist_songs = json.loads((fixtures_dir / "genius_artist_songs.json").read_text(encoding="utf-8"))
+        self.genius_song = (fixtures_dir / "genius_song.html").read_text(encoding="utf-8")
+        self.spotify_search = json.loads((fixtures_dir / "spotify_search.json").read_text(encoding="utf-8"))
+        self.spotify_playlist_items = json.loads((fixtures_dir / "spotify_playlist_items.json").read_text(encoding="utf-8"))
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._create_handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def search_artist(self, query: Dict) -> Dict:
+        response = copy.deepcopy(self.genius_search)
+        artist_name = query["q"][0]
+        hit = response["response"]["hits"][0]
+        hit["result"]["primary_artist"]["name"] = artist_name
+        hit["result"]["primary_artist"]["id"] = self.artists.index(artist_name) + 1 if artist_name in self.artists else -1
+        return response
+
+    def artist_songs(self, artist_id: int, query: Dict) -> Dict:
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", ["20"])[0])
+        songs = self.songs[artist_id - 1]
+        template = self.genius_artist_songs["response"]["songs"][0]
+
+        page_songs = []
+        for song_idx in range((page - 1) * per_page, min(page * per_page, len(songs))):
+            song = copy.deepcopy(template)
+            song["title"] = songs[song_idx][0]
+            song["path"] = f"/songs/{artist_id}/{song_idx}"
+            song["primary_artist"]["id"] = artist_id
+            page_songs.append(song)
+
+        response = copy.deepcopy(self.genius_artist_songs)
+        response["response"]["songs"] = page_songs
+        response["response"]["next_page"] = page + 1 if page * per_page < len(songs) else None
+        return response
+
+    def song_page(self, artist_id: int, song_idx: int) -> str:
+        lyrics = self.songs[artist_id - 1][song_idx][1]
+        return self.genius_song.replace("<!-- LYRICS -->", "<br/>".join(html.escape(line) for line in lyrics.split("\n")))
+
+    def playlists(self, query: Dict) -> Dict:
+        offset = int(query.get("offset", ["0"])[0])
+        response = copy.deepcopy(self.spotify_search)
+        template = response["playlists"]["items"][0]
+
+        items = []
+        for playlist_idx in range(self.nb_playlists):
+            playlist = copy.deepcopy(template)
+            playlist["id"] = f"{offset}x{playlist_idx}"
+            items.append(playlist)
+
+        response["playlists"]["items"] = items
+        response["playlists"]["offset"] = offset
+        return response
+
+    def playlist_tracks(self) -> Dict:
+        response = copy.deepcopy(self.spotify_playlist_items)
+        template = response["items"][0]
+
+        items = []
+        for artist_idx, artist_name in enumerate(self.artists):
+            item = copy.deepcopy(template)
+            item["track"]["artists"][0]["id"] = f"artist{artist_idx}"
+            item["track"]["artists"][0]["name"] = artist_name
+            items.append(item)
+
+        response["items"] = items
+        response["total"] = len(items)
+        return response
+
+    def _create_handler(self):
+        fixtures = self
+
+        class FixturesHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, body: str, content_type: str, status: int = 200) -> None:
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+
+                if url.path in ("/search", "/search/"):
+                    self._send(json.dumps(fixtures.search_artist(query)), "application/json")
+                elif match := re.fullmatch(r"/artists/(\d+)/songs", url.path):
+                    self._send(json.dumps(fixtures.artist_songs(int(match.group(1)), query)), "application/json")
+                elif match := re.fullmatch(r"/songs/(\d+)/(\d+)", url.path):
+                    self._send(fixtures.song_page(int(match.group(1)), int(match.group(2))), "text/html")
+                elif url.path == "/v1/search":
+                    self._send(json.dumps(fixtures.playlists(query)), "application/json")
+                elif re.fullmatch(r"/v1/playlists/[^/]+/tracks", url.path):
+                    self._send(json.dumps(fixtures.playlist_tracks()), "application/json")
+                else:
+                    self._send(json.dumps({"error": "not found"}), "application/json", 404)
+
+        return FixturesHandler
+
+
+class HashingEmbeddings(Embeddings):
+    """Tiny embedding stand-in: hashed bag of words, L2 normalized."""
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode("utf-8")) % self.size] += 1.0
+
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+class ByteTokenizer:
+    """Tiny tokenizer stand-in: one token per UTF-8 byte, plus the padding, BOS and EOS tokens."""
+
+    pad_token_id = 256
+    bos_token_id = 257
+    eos_token_id = 258
+    vocab_size = 259
+
+    def __call__(self, text: str, add_special_tokens: bool = True, return_offsets_mapping: bool = False) -> Dict:
+        input_ids, offset_mapping = [], []
+        if add_special_tokens:
+            input_ids.append(self.bos_token_id)
+            offset_mapping.append((0, 0))
+
+        for char_idx, char in enumerate(text):
+            for byte in char.encode("utf-8"):
+                input_ids.append(byte)
+                offset_mapping.append((char_idx, char_idx + 1))
+
+        encoding = {"input_ids": input_ids}
+        if return_offsets_mapping:
+            encoding["offset_mapping"] = offset_mapping
+        return encoding
+
+    def decode(self, token_ids: List[int], skip_special_tokens: bool = True) -> str:
+        return bytes(token_id for token_id in token_ids if token_id < 256).decode("utf-8", errors="replace")
+
+
+def get_tiny_llm(vocab_size: int, seed: int):
+    """Tiny LLM stand-in: a randomly initialized 2 layers Mistral model."""
+    torch.manual_seed(seed)
+    config = MistralConfig(
+        vocab_size=vocab_size,
+        hidden_size=64,
+        intermediate_size=128,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=8192,
+    )
+
+    return AutoModelForCausalLM.from_config(config).eval()
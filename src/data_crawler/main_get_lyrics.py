@@ -1,13 +1,15 @@
 import os
 import json
 
+from src.paths import PARENT_DIR
+from src.utils.metrics import configure_metrics
 from src.utils.logger import get_console_logger
-from src.utils.file_utils import get_config, write_json_file
-from utils.lyrics_utils import get_genius_headers, get_artists_ids, get_artist_songs_url, get_song_lyrics
+from src.utils.file_utils import get_config, write_json_file, get_safe_file_name
+from src.data_crawler.utils.lyrics_utils import get_genius_headers, get_artists_ids, get_artist_songs_url, get_song_lyrics
 
 logger = get_console_logger()
 
-def main():
+def main(CONFIG=None):
     """
     Fetch and save lyrics for specified artists from Genius.
 
@@ -29,28 +31,31 @@ def main():
     Requires:
     - The Genius API key set up in environment variables or passed through the configuration.
     """
-    CONFIG = get_config("main.yml")
+    if CONFIG is None:
+        CONFIG = get_config("main.yml")
     artists_names       = CONFIG["artists"]["names"]
-    artists_lyrics_dir  = CONFIG["artists"]["lyrics_dir"]
+    artists_lyrics_dir  = PARENT_DIR / CONFIG["artists"]["lyrics_dir"]
     genius_base_url     = CONFIG["genius"]['base_url']
     genius_api_base_url = CONFIG["genius"]['api_base_url']
     min_sleep_time      = CONFIG["genius"]['min_sleep_time']
     max_sleep_time      = CONFIG["genius"]['max_sleep_time']
+    max_retries         = CONFIG["genius"]['max_retries']
+
+    metrics = configure_metrics(CONFIG, "crawl_lyrics")
 
     os.makedirs(artists_lyrics_dir, exist_ok=True)
 
     headers = get_genius_headers()
-    artists_ids = get_artists_ids(genius_api_base_url, headers, artists_names)
+    with metrics.span("crawler_stage", stage="artists_ids"):
+        artists_ids = get_artists_ids(genius_api_base_url, headers, artists_names)
 
     for artist_id, artist_name in artists_ids.items():
-        song_urls = get_artist_songs_url(genius_api_base_url, headers, artist_id)
-        logger.info(f'Fetching {len(song_urls)} songs for artist: {artist_name}')
-        artist_lyrics = get_song_lyrics(genius_base_url, song_urls, min_sleep_time, max_sleep_time)
+        with metrics.span("crawler_artist", item=artist_name):
+            song_urls = get_artist_songs_url(genius_api_base_url, headers, artist_id)
+            logger.info(f'Fetching {len(song_urls)} songs for artist: {artist_name}')
+            artist_lyrics = get_song_lyrics(genius_base_url, song_urls, min_sleep_time, max_sleep_time, max_retries)
         
-        safe_artist_name = "".join(
-            c if c.isalnum() or c in " ._-()" else "_"
-            for c in artist_name
-        )
+        safe_artist_name = get_safe_file_name(artist_name)
 
         # Constructing the file path
         file_path = os.path.join(artists_lyrics_dir, f"{safe_artist_name}.json")
@@ -59,6 +64,7 @@ def main():
         write_json_file(artist_lyrics, file_path)
 
         logger.info(f"Lyrics for {artist_name} saved to {file_path}")
+        metrics.flush()
 
 if __name__ == '__main__':
     main()
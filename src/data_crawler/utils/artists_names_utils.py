@@ -5,10 +5,12 @@ from typing import List, Dict, Set
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth, SpotifyClientCredentials
 
+from src.utils.metrics import get_metrics
 from src.utils.file_utils import get_spotify_cred
 from src.utils.logger import get_console_logger
 
 logger = get_console_logger()
+metrics = get_metrics()
 
 def search_french_rap_playlists(sp, query: str, type: str, offsets: List[int], limit: int) -> List[str]:
     """
@@ -25,11 +27,13 @@ def search_french_rap_playlists(sp, query: str, type: str, offsets: List[int], l
 
     for offset in offsets:
         logger.info(f'Fetching playlists starting from offset: {offset}')
-        response = sp.search(q=query, limit=limit, type=type, offset=offset)
+        with metrics.span("spotify_request", endpoint="search"):
+            response = sp.search(q=query, limit=limit, type=type, offset=offset)
         all_playlist_ids.extend([item["id"] for item in response["playlists"]["items"] if item["tracks"]["total"] >= limit])
 
         while response["playlists"]["next"]:
-            response = sp.next(response["playlists"])
+            with metrics.span("spotify_request", endpoint="search"):
+                response = sp.next(response["playlists"])
             all_playlist_ids.extend([item["id"] for item in response["playlists"]["items"] if item["tracks"]["total"] >= limit])
 
     return all_playlist_ids
@@ -48,11 +52,13 @@ def get_tracks(sp, playlist_id: str) -> List[Dict]:
     """
     tracks = []
 
-    result = sp.playlist_items(playlist_id)
+    with metrics.span("spotify_request", endpoint="playlist_items"):
+        result = sp.playlist_items(playlist_id)
     tracks.extend(result["items"])
 
     while result["next"]:
-        result = sp.next(result)
+        with metrics.span("spotify_request", endpoint="playlist_items"):
+            result = sp.next(result)
         tracks.extend(result["items"])
 
     return tracks
@@ -118,7 +124,8 @@ def get_artists_names(sp, artist_ids: Set[str], genre: str) -> Set[str]:
         
         time.sleep(rd.uniform(0.2, 0.7))
         logger.info(f"Fetching artist {artist_id}")
-        result = sp.artist(artist_id)
+        with metrics.span("spotify_request", endpoint="artist"):
+            result = sp.artist(artist_id)
 
         if "genres" in result and genre in result["genres"]:
             logger.info(result["name"])
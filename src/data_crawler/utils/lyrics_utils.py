@@ -6,10 +6,12 @@ from typing import List, Dict, Tuple
 
 from bs4 import BeautifulSoup
 
+from src.utils.metrics import get_metrics
 from src.utils.logger import get_console_logger
 from src.utils.file_utils import get_genius_cred
 
 logger = get_console_logger()
+metrics = get_metrics()
 
 def get_artists_ids(api_base_url: str, headers: Dict[str, str], artists_names: List[str]) -> Dict[str, str]:
     """Fetch artist IDs based on artist names.
@@ -28,6 +30,7 @@ def get_artists_ids(api_base_url: str, headers: Dict[str, str], artists_names: L
         params = {"q": artist_name}
         logger.info(f"Looking for {artist_name} id")
         response = requests.get(f"{api_base_url}/search/", params=params, headers=headers)
+        metrics.record_http_response(response, "genius_search")
         response_json = response.json()
 
         artist_id = None
@@ -66,6 +69,7 @@ def get_artist_songs_url(api_base_url: str, headers: Dict[str, str], artist_id:
             params=params,
             headers=headers
         )
+        metrics.record_http_response(response, "genius_artist_songs")
         response_json = response.json()
         
         for song in response_json['response']['songs']:
@@ -100,7 +104,7 @@ def extract_verse_refrain(lyrics: str) -> Tuple:
 
     return intro, pre_chorus, verses, chorus, outro
 
-def get_song_lyrics(base_url: str, song_urls, min_sleep_time: int, max_sleep_time: int) -> Dict:
+def get_song_lyrics(base_url: str, song_urls, min_sleep_time: int, max_sleep_time: int, max_retries: int = 3) -> Dict:
     """
     Fetch and store song lyrics categorized by verses and refrains.
 
@@ -109,6 +113,7 @@ def get_song_lyrics(base_url: str, song_urls, min_sleep_time: int, max_sleep_tim
     song_urls (list of tuples): A list of tuples containing song names and URLs.
     min_sleep_time (float): Minimum sleep time between two scrapes of the Genius website.
     max_sleep_time (float): Maximum sleep time between two scrapes of the Genius website.
+    max_retries (int): Maximum number of retries of a rate limited song before skipping it.
 
     Returns:
     dict: A dictionary containing song lyrics categorized by verses and refrains.
@@ -116,41 +121,59 @@ def get_song_lyrics(base_url: str, song_urls, min_sleep_time: int, max_sleep_tim
     artist_lyrics = {}
 
     for song_name, url in song_urls.items():
-        try:
-            time.sleep(rd.uniform(min_sleep_time, max_sleep_time))
-            response = requests.get(f"{base_url}{url}")
-
-            if response.status_code == 200:
-                artist_lyrics[song_name] = {}
-
-                html = BeautifulSoup(response.text, "html.parser")
-                div = html.find("div", class_=re.compile("^lyrics$|Lyrics__Root"))
-
-                if div:
-                    lyrics = div.get_text(separator="\n")
-                    intro, pre_chorus, verses, chorus, outro = extract_verse_refrain(lyrics)
-                    artist_lyrics[song_name]['lyrics'] = lyrics
-                    artist_lyrics[song_name]['intro'] = intro
-                    artist_lyrics[song_name]['verses'] = verses
-                    artist_lyrics[song_name]['pre_chorus'] = pre_chorus
-                    artist_lyrics[song_name]['chorus'] = chorus
-                    artist_lyrics[song_name]['outro'] = outro
-                else:
-                    print(f"Lyrics not found for {song_name}")
-
-            elif response.status_code == 429:  # Rate limited
-                reset_time = int(response.headers.get('X-RateLimit-Reset', 0)) - int(time.time())
-                reset_time = max(0, reset_time)
-                logger.info(f"Rate limit exceeded. Sleeping for {reset_time} seconds.")
-                time.sleep(reset_time)
-                continue  # retry the current song
-
-            else:
-                print(f"Error fetching {song_name}. HTTP Status Code: {response.status_code}")
-
-        except requests.RequestException as e:
-            logger.info(f"An error occurred: {e}")
-            continue
+        time.sleep(rd.uniform(min_sleep_time, max_sleep_time))
+
+        for attempt in range(max_retries + 1):
+            try:
+                with metrics.span("crawler_song", item=song_name):
+                    response = requests.get(f"{base_url}{url}")
+                    metrics.record_http_response(response, "genius_song_page")
+
+                    if response.status_code == 200:
+                        artist_lyrics[song_name] = {}
+
+                        html = BeautifulSoup(response.text, "html.parser")
+                        div = html.find("div", class_=re.compile("^lyrics$|Lyrics__Root"))
+
+                        if div:
+                            lyrics = div.get_text(separator="\n")
+                            intro, pre_chorus, verses, chorus, outro = extract_verse_refrain(lyrics)
+                            artist_lyrics[song_name]['lyrics'] = lyrics
+                            artist_lyrics[song_name]['intro'] = intro
+                            artist_lyrics[song_name]['verses'] = verses
+                            artist_lyrics[song_name]['pre_chorus'] = pre_chorus
+                            artist_lyrics[song_name]['chorus'] = chorus
+                            artist_lyrics[song_name]['outro'] = outro
+                            metrics.inc("songs_processed_total", stage="crawl", status="ok")
+                        else:
+                            logger.warning(f"Lyrics not found for {song_name}")
+                            metrics.inc("songs_processed_total", stage="crawl", status="lyrics_not_found")
+
+                    elif response.status_code != 429:
+                        logger.warning(f"Error fetching {song_name}. HTTP Status Code: {response.status_code}")
+                        metrics.inc("songs_processed_total", stage="crawl", status="http_error")
+
+            except requests.RequestException as e:
+                logger.info(f"An error occurred: {e}")
+                metrics.inc("http_errors_total", endpoint="genius_song_page", error=type(e).__name__)
+                metrics.inc("songs_processed_total", stage="crawl", status="request_error")
+                break
+
+            if response.status_code != 429:
+                break
+
+            # Rate limited: waits for the reset and retries the current song
+            metrics.inc("http_rate_limited_total", endpoint="genius_song_page")
+            if attempt == max_retries:
+                logger.warning(f"Rate limit exceeded {max_retries + 1} times, skipping {song_name}")
+                metrics.inc("songs_processed_total", stage="crawl", status="rate_limited")
+                break
+
+            reset_time = int(response.headers.get('X-RateLimit-Reset', 0)) - int(time.time())
+            reset_time = max(0, reset_time)
+            logger.info(f"Rate limit exceeded. Sleeping for {reset_time} seconds before retrying {song_name}.")
+            metrics.inc("http_retries_total", endpoint="genius_song_page")
+            time.sleep(reset_time)
 
     return artist_lyrics
 
@@ -1,23 +1,26 @@
 from langchain_community.vectorstores import Qdrant
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import SentenceTransformerEmbeddings
-from langchain_community.document_loaders import JSONLoader, DirectoryLoader
 
 from src.paths import DATA_DIR
-from src.utils.file_utils import get_config
+from src.utils.metrics import configure_metrics
 from src.utils.logger import get_console_logger
+from src.utils.file_utils import get_config, read_songs_json_files
+from src.data_ingestion.utils.ingest_utils import InstrumentedEmbeddings, get_artists_names_mapping, get_songs_sentiments, create_lyrics_documents, create_payload_indexes
 
 logger = get_console_logger()
 
-def main():
+def main(CONFIG=None):
     """
     Main script to perform the data ingestion into the Qdrant Vector Database.
     
     The script performs the following operations:
     - Loads the embeddings.
-    - Creates a document loader
+    - Loads the songs and creates one document per song section, with the artist, song,
+      section and main emotion (computed by the metadata preprocessor) as metadata.
     - Creates a text splittre and apply it on the data
-    - Vectorizes and saves the data into the Qdrant DataBase
+    - Vectorizes and saves the data into the Qdrant DataBase, replacing the previous collection
+    - Creates the payload indexes used to pre-filter the searches on the metadata
     
     Configuration for the script, including file paths and processing parameters, 
     is loaded from a 'main.yml' file.
@@ -26,22 +29,34 @@ def main():
         None
     """
     
-    CONFIG = get_config("main.yml")
+    if CONFIG is None:
+        CONFIG = get_config("main.yml")
+    metrics = configure_metrics(CONFIG, "ingest")
     
-    embeddings = SentenceTransformerEmbeddings(model_name=CONFIG["qdrant"]["embeddings_model_name"])
+    with metrics.span("ingest_step", step="load_embeddings"):
+        embeddings = InstrumentedEmbeddings(SentenceTransformerEmbeddings(model_name=CONFIG["qdrant"]["embeddings_model_name"]))
     logger.info('Embeddings loaded')
     
-    loader = DirectoryLoader(DATA_DIR, glob=CONFIG["qdrant"]["loader_glob"], show_progress=True, loader_cls=JSONLoader)
-    documents = loader.load()
-    logger.info('Loader initiated')
+    with metrics.span("ingest_step", step="create_documents"):
+        songs_data = read_songs_json_files(f"{DATA_DIR}/raw")
+        artists_mapping = get_artists_names_mapping(CONFIG["artists"]["names"])
+        songs_sentiments = get_songs_sentiments(DATA_DIR / CONFIG["preprocessor"]["save_path"])
+        documents = create_lyrics_documents(songs_data, artists_mapping, songs_sentiments)
+    metrics.inc("songs_processed_total", len(songs_data), stage="ingest", status="ok")
+    logger.info(f'Created {len(documents)} documents')
 
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=CONFIG["qdrant"]["chunk_size"], chunk_overlap=CONFIG["qdrant"]["chunk_overlap"])
-    texts = text_splitter(documents)
+    with metrics.span("ingest_step", step="split"):
+        texts = text_splitter.split_documents(documents)
     logger.info('Text split done')
     
-    Qdrant.from_documents(texts, embeddings, url=CONFIG["qdrant"]["url"], prefer_grpc=False, collection_name=CONFIG["qdrant"]["collection_name"])
-
+    with metrics.span("ingest_step", step="embed_and_upload"):
+        # recreates the collection, the stage runner re-runs the ingestion whenever the lyrics change
+        Qdrant.from_documents(texts, embeddings, url=CONFIG["qdrant"]["url"], prefer_grpc=False, collection_name=CONFIG["qdrant"]["collection_name"], force_recreate=True)
     logger.info("Vector Database created")
+
+    create_payload_indexes(CONFIG["qdrant"]["url"], CONFIG["qdrant"]["collection_name"], CONFIG["qdrant"]["payload_indexes"])
+    logger.info("Payload indexes created")
   
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,97 @@
+import os
+from typing import List, Dict, Tuple
+
+import pandas as pd
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from langchain_core.embeddings import Embeddings
+from langchain.docstore.document import Document
+
+from src.utils.metrics import get_metrics
+from src.utils.file_utils import SECTIONS, get_artists_names_mapping
+
+metrics = get_metrics()
+
+class InstrumentedEmbeddings(Embeddings):
+    """Wraps an embeddings model to record the latency and size of each embedding batch."""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with metrics.span("embedding_batch", stage="ingest"):
+            vectors = self.embeddings.embed_documents(texts)
+        metrics.inc("embedded_texts_total", len(texts), stage="ingest")
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        with metrics.span("embedding_query", stage="ingest"):
+            return self.embeddings.embed_query(text)
+
+def get_songs_sentiments(metadata_path: str) -> Dict[Tuple[str, str], str]:
+    """Loads the main sentiment of each song computed by the metadata preprocessor.
+
+    Args:
+    metadata_path (str): path to the parquet file saved by the metadata preprocessor.
+
+    Returns:
+    dict: A dict with (artist file name, song name) as key and the main sentiment as value.
+    """
+    if not os.path.exists(metadata_path):
+        return {}
+
+    df = pd.read_parquet(metadata_path, columns=["artist_name", "song_name", "main_sentiment"])
+
+    return {(artist, song): sentiment for artist, song, sentiment in df.itertuples(index=False)}
+
+def create_lyrics_documents(songs_data: List[Dict], artists_mapping: Dict[str, str], songs_sentiments: Dict[Tuple[str, str], str], default_sentiment: str = "neutre") -> List[Document]:
+    """Creates one document per song section with the artist, song, section and emotion as metadata.
+
+    Songs without any tagged section are kept as a single "lyrics" section.
+
+    Args:
+    songs_data (list of dict): the songs loaded with read_songs_json_files.
+    artists_mapping (dict): mapping from the safe file names to the artists names.
+    songs_sentiments (dict): main sentiment of each song, see get_songs_sentiments.
+    default_sentiment (str): sentiment used for the songs missing from songs_sentiments.
+
+    Returns:
+    list of Document: the documents to split and ingest.
+    """
+    documents = []
+
+    for song in songs_data:
+        file_artist_name = song["artist_name"]
+        song_name = song["song_name"]
+        metadata = {
+            "artist_name": artists_mapping.get(file_artist_name, file_artist_name),
+            "song_name": song_name,
+            "main_sentiment": songs_sentiments.get((file_artist_name, song_name), default_sentiment),
+        }
+
+        sections = [(section, text) for section in SECTIONS for text in song.get(section, []) if text.strip()]
+        if not sections and song.get("lyrics"):
+            sections = [("lyrics", song["lyrics"])]
+
+        for section, text in sections:
+            documents.append(Document(page_content=text.strip(), metadata={**metadata, "section": section}))
+
+    return documents
+
+def create_payload_indexes(url: str, collection_name: str, fields: List[str]) -> None:
+    """Creates keyword payload indexes on the documents metadata so that filtered searches
+    only visit the matching points.
+
+    Args:
+    url (str): the Qdrant url.
+    collection_name (str): the collection to index.
+    fields (list of str): the metadata fields to index.
+    """
+    client = QdrantClient(url=url, prefer_grpc=False)
+
+    for field in fields:
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=f"metadata.{field}",
+            field_schema=models.PayloadSchemaType.KEYWORD,
+        )
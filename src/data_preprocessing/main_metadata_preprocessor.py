@@ -1,13 +1,16 @@
+import os
+
 import pandas as pd
 
 from src.paths import DATA_DIR
+from src.utils.metrics import configure_metrics
 from src.utils.logger import get_console_logger
 from src.utils.file_utils import read_songs_json_files, get_config
-from utils.metadata_utils import add_int_data, clean_lyrics, add_most_common_words, get_most_frequent_emotion
+from src.data_preprocessing.utils.metadata_utils import add_int_data, clean_lyrics, add_most_common_words, get_most_frequent_emotion
 
 logger = get_console_logger()
 
-def main():
+def main(CONFIG=None):
     """
     Main script to enrich song lyrics with metadata and preprocess text for analysis.
     
@@ -26,14 +29,18 @@ def main():
         None
     """
     
-    CONFIG = get_config("main.yml")
+    if CONFIG is None:
+        CONFIG = get_config("main.yml")
     char_upperbound  = CONFIG["preprocessor"]["lyrics_char_upperbound"]
     char_lowerbound  = CONFIG["preprocessor"]["lyrics_char_lowerbound"]
     emotion_csv_path = CONFIG["preprocessor"]["emotions_csv_path"]
     save_path        = CONFIG["preprocessor"]["save_path"]
     emotions         = CONFIG["preprocessor"]["emotions"]
+
+    metrics = configure_metrics(CONFIG, "preprocess")
     
-    songs_data = read_songs_json_files(f"{DATA_DIR}/raw")
+    with metrics.span("preprocess_step", step="read_songs"):
+        songs_data = read_songs_json_files(f"{DATA_DIR}/raw")
 
     df = pd.DataFrame(songs_data)
     logger.info('Songs data loaded in a Dataframe')
@@ -42,15 +49,21 @@ def main():
     df['lyrics'] = df['lyrics'].astype("string")
 
     logger.info('Data enrichment process')
-    df = add_int_data(df)
+    with metrics.span("preprocess_step", step="add_int_data"):
+        df = add_int_data(df)
     # data selection to avoid outliers and songs with no/ to much lyrics
+    nb_songs = len(df)
     df = df.loc[(df.nb_words <= char_upperbound) & (df.nb_words >= char_lowerbound)]
+    metrics.inc("songs_processed_total", len(df), stage="preprocess", status="kept")
+    metrics.inc("songs_processed_total", nb_songs - len(df), stage="preprocess", status="filtered_out")
     logger.info('Added words and characters counts')
     
-    df = clean_lyrics(df)
+    with metrics.span("preprocess_step", step="clean_lyrics"):
+        df = clean_lyrics(df)
     logger.info('Cleaned raw lyrics text (stop words removal and lemmatization)')
     
-    df = add_most_common_words(df)
+    with metrics.span("preprocess_step", step="add_most_common_words"):
+        df = add_most_common_words(df)
     logger.info('Added most common words')
 
     lexicon_df = pd.read_csv(DATA_DIR / emotion_csv_path, delimiter=';')
@@ -58,9 +71,11 @@ def main():
     lexicon_df = lexicon_df.drop_duplicates(subset='word')
     emotion_dict = lexicon_df.set_index('word')[emotions].to_dict()
 
-    df['main_sentiment'] = df["lemma_str"].apply(lambda x: get_most_frequent_emotion(x, emotion_dict))
+    with metrics.span("preprocess_step", step="emotion_scoring"):
+        df['main_sentiment'] = df["lemma_str"].apply(lambda x: get_most_frequent_emotion(x, emotion_dict))
     logger.info('Added most common sentiment')
 
+    os.makedirs((DATA_DIR / save_path).parent, exist_ok=True)
     df.to_parquet(DATA_DIR / save_path)
 
 if __name__ == '__main__':
@@ -0,0 +1,91 @@
+import os
+import sys
+import signal
+
+from src.paths import DATA_DIR
+from src.utils.file_utils import get_config
+from src.utils.metrics import configure_metrics
+from src.utils.logger import get_console_logger
+from src.inference_server.utils.batching_utils import DynamicBatcher
+from src.inference_server.utils.kv_cache_utils import PrefixKVCache
+from src.inference_server.utils.server_utils import create_server
+from src.inference_server.utils.model_utils import get_model_and_tokenizer, get_generation_params
+from src.inference_server.utils.retrieval_utils import create_vector_store, get_prompt_template
+from src.rhyme_index.utils.rhyme_index_utils import RhymeIndex
+
+logger = get_console_logger()
+
+def main(CONFIG=None):
+    """
+    Main script to launch the local inference server used by the app.
+    
+    The script performs the following operations:
+    - Loads the LLM, tokenizer, vector store and prompt template once for all the users, and
+      memory maps the rhyme index (see main_build_rhyme_index.py) when it was built.
+    - Starts the dynamic batcher, which collects the concurrent prompts into batches bounded by
+      a maximum size, a maximum number of tokens and a maximum waiting time, and generates them
+      together. With the prefix KV cache, the attention states of the static template prefix
+      and of recurring (prefix + context) combinations are reused and only the rest of each
+      prompt is prefilled.
+    - Serves the HTTP API: each caller gets its own stream of generated tokens, and requests are
+      refused with a 503 once the queue depth limit is reached. The rhyme queries get the rhymes
+      found in the lyrics as context instead of the vector search results.
+    
+    Configuration for the script, including the batching limits and the server address, 
+    is loaded from a 'main.yml' file.
+    
+    Returns:
+        None
+    """
+    if CONFIG is None:
+        CONFIG = get_config("main.yml")
+    server_config = CONFIG["inference_server"]
+    metrics = configure_metrics(CONFIG, "inference_server")
+
+    model, tokenizer = get_model_and_tokenizer(CONFIG)
+    logger.info("LLM set")
+
+    db = create_vector_store(CONFIG)
+    logger.info("Vector store set")
+
+    prompt_template = get_prompt_template(CONFIG)
+    logger.info("Prompt Template set")
+
+    rhyme_index = None
+    rhyme_index_path = DATA_DIR / CONFIG["rhyme_index"]["path"]
+    if os.path.exists(rhyme_index_path):
+        rhyme_index = RhymeIndex(rhyme_index_path)
+        logger.info(f"Rhyme index set ({len(rhyme_index.keys)} rimes)")
+    else:
+        logger.warning(f"No rhyme index at {rhyme_index_path}, the rhyme queries use the vector search")
+
+    kv_cache = None
+    if server_config["kv_cache"]["enabled"]:
+        kv_cache = PrefixKVCache(server_config["kv_cache"]["max_memory_mb"])
+        logger.info(f"Prefix KV cache enabled ({server_config['kv_cache']['max_memory_mb']}MB)")
+
+    batcher = DynamicBatcher(
+        model,
+        tokenizer,
+        get_generation_params(CONFIG),
+        max_batch_size=server_config["max_batch_size"],
+        max_batch_tokens=server_config["max_batch_tokens"],
+        max_wait_ms=server_config["max_wait_ms"],
+        max_queue_size=server_config["max_queue_size"],
+        kv_cache=kv_cache,
+    )
+    batcher.start()
+    logger.info("Batcher started")
+
+    # stops on SIGTERM (docker stop, systemd) through the finally block, to flush the metrics
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    server = create_server(CONFIG, batcher, db, prompt_template, rhyme_index)
+    logger.info(f"Inference server listening on {server_config['host']}:{server_config['port']}")
+    try:
+        server.serve_forever()
+    finally:
+        metrics.flush()
+
+if __name__ == "__main__":
+    main()
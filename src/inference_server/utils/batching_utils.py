@@ -0,0 +1,342 @@
+import time
+import queue
+import bisect
+import itertools
+import threading
+from typing import List, Dict, Optional
+
+import torch
+
+from src.utils.metrics import get_metrics
+from src.utils.logger import get_console_logger
+from src.inference_server.utils.kv_cache_utils import PrefixKVCache, prefill_with_cache
+
+logger = get_console_logger()
+metrics = get_metrics()
+
+
+class QueueFullError(Exception):
+    """Raised when the generation queue reached its maximum depth."""
+
+
+def get_prefix_lengths(offset_mapping: List, prefixes: List[str]) -> List[int]:
+    """Returns the number of tokens covered by each prefix of the prompt: the tokens ending
+    before the last character of the prefix.
+
+    Args:
+    offset_mapping (list of tuple): the (start, end) characters of each prompt token.
+    prefixes (list of str): the prompt prefixes.
+
+    Returns:
+    list of int: the prefixes lengths in tokens.
+    """
+    token_ends = [end for _, end in offset_mapping]
+    return [bisect.bisect_right(token_ends, len(prefix)) for prefix in prefixes]
+
+
+class GenerationRequest:
+    """A prompt waiting to be generated, with its own stream of generated text."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, prompt_ids: List[int], max_new_tokens: int, prefix_lengths: Optional[List[int]] = None):
+        self.id = next(self._ids)
+        self.prompt_ids = prompt_ids
+        self.max_new_tokens = max_new_tokens
+        self.prefix_lengths = prefix_lengths or []
+        self.nb_generated_tokens = 0
+        self.cancelled = threading.Event()
+        self.output = queue.Queue()
+
+    @property
+    def nb_tokens(self) -> int:
+        return len(self.prompt_ids) + self.max_new_tokens
+
+    def push(self, text: str) -> None:
+        self.output.put(text)
+
+    def finish(self) -> None:
+        self.output.put(None)
+
+    def fail(self, error: Exception) -> None:
+        self.output.put(error)
+
+    def stream(self, timeout: Optional[float] = None):
+        """Yields the generated text pieces until the generation is over.
+
+        Args:
+        timeout (float): maximum time to wait for the next piece of text.
+        """
+        while True:
+            item = self.output.get(timeout=timeout)
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+class DynamicBatcher:
+    """Collects the concurrent generation requests into batches and generates them together.
+
+    A batch is closed when it reaches `max_batch_size` requests, when adding the next request
+    would exceed `max_batch_tokens` (prompt plus new tokens) or when `max_wait_ms` went by since
+    its first request. New requests are refused once `max_queue_size` requests are waiting.
+    When a `kv_cache` is given, the prompts are prefilled from their longest cached prefix.
+    """
+
+    def __init__(self, model, tokenizer, generation_params: Dict, max_batch_size: int, max_batch_tokens: int, max_wait_ms: float, max_queue_size: int, kv_cache: Optional[PrefixKVCache] = None):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.generation_params = generation_params
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_wait = max_wait_ms / 1000
+        self.kv_cache = kv_cache
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        # Fast tokenizers can not be used from several threads at the same time
+        self.tokenizer_lock = threading.Lock()
+        self._pending = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, prompt: str, prefixes: Optional[List[str]] = None) -> GenerationRequest:
+        """Tokenizes the prompt and queues it for generation.
+
+        Args:
+        prompt (str): the full prompt sent to the LLM.
+        prefixes (list of str): the prefixes of the prompt whose key/value states can be cached.
+
+        Returns:
+        GenerationRequest: the request, to stream the generated text from.
+
+        Raises:
+        QueueFullError: when too many requests are already waiting.
+        """
+        with self.tokenizer_lock:
+            encoding = self.tokenizer(prompt, add_special_tokens=True, return_offsets_mapping=self.kv_cache is not None)
+        prompt_ids = encoding["input_ids"]
+
+        prefix_lengths = []
+        if self.kv_cache is not None and prefixes:
+            prefix_lengths = get_prefix_lengths(encoding["offset_mapping"], prefixes)
+
+        request = GenerationRequest(prompt_ids, self.generation_params["max_new_tokens"], prefix_lengths)
+
+        try:
+            self.queue.put_nowait(request)
+        except queue.Full:
+            metrics.inc("generation_requests_total", status="rejected")
+            raise QueueFullError(f"{self.queue.maxsize} requests already waiting")
+
+        metrics.inc("generation_requests_total", status="accepted")
+        metrics.set("generation_queue_depth", self.queue.qsize())
+
+        return request
+
+    def _collect_batch(self) -> List[GenerationRequest]:
+        first = self._pending if self._pending is not None else self.queue.get()
+        self._pending = None
+
+        batch = [first]
+        batch_tokens = first.nb_tokens
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+            if batch_tokens + request.nb_tokens > self.max_batch_tokens:
+                self._pending = request
+                break
+
+            batch.append(request)
+            batch_tokens += request.nb_tokens
+
+        return [request for request in batch if not request.cancelled.is_set()]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            logger.info(f"Generating a batch of {len(batch)} requests ({self.queue.qsize()} waiting)")
+            metrics.set("generation_queue_depth", self.queue.qsize())
+            metrics.observe("generation_batch_size", len(batch))
+            try:
+                with metrics.span("generation_batch"):
+                    generate_batch(self.model, self.tokenizer, batch, self.generation_params, self.tokenizer_lock, self.kv_cache)
+            except Exception as e:
+                logger.exception("Batch generation failed")
+                for request in batch:
+                    request.fail(e)
+            metrics.inc("tokens_generated_total", sum(request.nb_generated_tokens for request in batch))
+
+
+def sample_next_tokens(logits: torch.Tensor, seen_ids: torch.Tensor, temperature: float, top_p: float, do_sample: bool, repetition_penalty: float) -> torch.Tensor:
+    """Picks the next token of each row of the batch.
+
+    Args:
+    logits (torch.Tensor): the last position logits, shape (batch, vocab).
+    seen_ids (torch.Tensor): the prompt and generated tokens, used by the repetition penalty.
+    temperature (float): the sampling temperature.
+    top_p (float): the nucleus sampling probability mass.
+    do_sample (bool): samples the tokens when True, greedy decoding otherwise.
+    repetition_penalty (float): the penalty applied to the already seen tokens.
+
+    Returns:
+    torch.Tensor: the next tokens, shape (batch,).
+    """
+    logits = logits.float()
+
+    if repetition_penalty != 1.0:
+        scores = torch.gather(logits, 1, seen_ids)
+        scores = torch.where(scores < 0, scores * repetition_penalty, scores / repetition_penalty)
+        logits = logits.scatter(1, seen_ids, scores)
+
+    if not do_sample:
+        return logits.argmax(dim=-1)
+
+    logits = logits / max(temperature, 1e-5)
+
+    if top_p < 1.0:
+        sorted_logits, sorted_indices = torch.sort(logits, descending=True)
+        cumulative_probs = sorted_logits.softmax(dim=-1).cumsum(dim=-1)
+        to_remove = cumulative_probs > top_p
+        to_remove[..., 1:] = to_remove[..., :-1].clone()
+        to_remove[..., 0] = False
+        sorted_logits = sorted_logits.masked_fill(to_remove, float("-inf"))
+        logits = torch.full_like(logits, float("-inf")).scatter(1, sorted_indices, sorted_logits)
+
+    return torch.multinomial(logits.softmax(dim=-1), num_samples=1).squeeze(-1)
+
+
+def record_prefill(requests: List[GenerationRequest], cached_lengths: List[int], prefill_time: float) -> None:
+    """Logs the prefill of each request of a batch and records the prefill metrics.
+
+    Args:
+    requests (list of GenerationRequest): the batch.
+    cached_lengths (list of int): the number of prompt tokens of each request reused from the prefix cache.
+    prefill_time (float): the duration of the batch prefill, in seconds.
+    """
+    metrics.observe("prefill_seconds", prefill_time)
+
+    for request, cached_length in zip(requests, cached_lengths):
+        prefill_tokens = len(request.prompt_ids) - cached_length
+        metrics.inc("prefill_tokens_total", prefill_tokens)
+        metrics.inc("prefill_cached_tokens_total", cached_length)
+        logger.info(
+            f"Request {request.id}: {len(request.prompt_ids)} prompt tokens, {cached_length} cached, "
+            f"{prefill_tokens} prefilled (cache {'hit' if cached_length else 'miss'}), "
+            f"batch of {len(requests)} prefilled in {prefill_time:.3f}s"
+        )
+
+
+@torch.inference_mode()
+def generate_batch(model, tokenizer, requests: List[GenerationRequest], generation_params: Dict, tokenizer_lock: Optional[threading.Lock] = None, kv_cache: Optional[PrefixKVCache] = None) -> None:
+    """Generates the requests of a batch together and streams each one its own text.
+
+    The prompts are left padded so that every row generates its next token at the last position.
+    Finished rows keep being fed the padding token until the whole batch is over.
+
+    Args:
+    model: the causal language model.
+    tokenizer: the model tokenizer.
+    requests (list of GenerationRequest): the batch.
+    generation_params (dict): temperature, top_p, do_sample and repetition_penalty.
+    tokenizer_lock (threading.Lock): held while decoding, when the tokenizer is shared with other threads.
+    kv_cache (PrefixKVCache): when given, the prompts are prefilled together from their longest
+        cached prefix instead of from scratch.
+    """
+    device = model.device
+    tokenizer_lock = tokenizer_lock or threading.Lock()
+    batch_size = len(requests)
+    prompt_length = max(len(request.prompt_ids) for request in requests)
+
+    input_ids = torch.full((batch_size, prompt_length), tokenizer.pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((batch_size, prompt_length), dtype=torch.long)
+    for row, request in enumerate(requests):
+        input_ids[row, prompt_length - len(request.prompt_ids):] = torch.tensor(request.prompt_ids)
+        attention_mask[row, prompt_length - len(request.prompt_ids):] = 1
+
+    input_ids, attention_mask = input_ids.to(device), attention_mask.to(device)
+    position_ids = (attention_mask.cumsum(dim=-1) - 1).clamp(min=0)
+
+    start = time.perf_counter()
+    if kv_cache is not None:
+        logits, past_key_values, attention_mask, position_ids, cached_lengths = prefill_with_cache(model, requests, kv_cache, tokenizer.pad_token_id)
+    else:
+        outputs = model(input_ids=input_ids, attention_mask=attention_mask, position_ids=position_ids, use_cache=True)
+        logits, past_key_values = outputs.logits[:, -1, :], outputs.past_key_values
+        cached_lengths = [0] * batch_size
+    record_prefill(requests, cached_lengths, time.perf_counter() - start)
+
+    seen_ids = input_ids
+    generated = [[] for _ in requests]
+    texts = ["" for _ in requests]
+    finished = [False for _ in requests]
+
+    for _ in range(max(request.max_new_tokens for request in requests)):
+        next_tokens = sample_next_tokens(
+            logits,
+            seen_ids,
+            generation_params["temperature"],
+            generation_params["top_p"],
+            generation_params["do_sample"],
+            generation_params["repetition_penalty"],
+        )
+
+        for row, (request, token) in enumerate(zip(requests, next_tokens.tolist())):
+            if finished[row]:
+                continue
+
+            if token == tokenizer.eos_token_id or request.cancelled.is_set():
+                finished[row] = True
+                request.finish()
+                continue
+
+            generated[row].append(token)
+            request.nb_generated_tokens += 1
+            with tokenizer_lock:
+                text = tokenizer.decode(generated[row], skip_special_tokens=True)
+            # Waits for the next tokens when the text ends in the middle of a multi-byte character
+            if not text.endswith("�") and len(text) > len(texts[row]):
+                request.push(text[len(texts[row]):])
+                texts[row] = text
+
+            if len(generated[row]) >= request.max_new_tokens:
+                finished[row] = True
+                request.finish()
+
+        if all(finished):
+            break
+
+        next_tokens = torch.tensor(
+            [tokenizer.pad_token_id if done else token for done, token in zip(finished, next_tokens.tolist())],
+            dtype=torch.long,
+            device=device,
+        ).unsqueeze(-1)
+        seen_ids = torch.cat([seen_ids, next_tokens], dim=-1)
+        attention_mask = torch.cat([attention_mask, torch.ones((batch_size, 1), dtype=torch.long, device=device)], dim=-1)
+        position_ids = position_ids[:, -1:] + 1
+
+        outputs = model(
+            input_ids=next_tokens,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=past_key_values,
+            use_cache=True,
+        )
+        logits, past_key_values = outputs.logits[:, -1, :], outputs.past_key_values
+
+    for row, request in enumerate(requests):
+        if not finished[row]:
+            request.finish()
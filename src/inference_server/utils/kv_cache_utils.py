@@ -0,0 +1,201 @@
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+
+from src.utils.metrics import get_metrics
+from src.utils.logger import get_console_logger
+
+logger = get_console_logger()
+metrics = get_metrics()
+
+try:
+    from transformers import DynamicCache
+except ImportError:
+    DynamicCache = None
+
+
+def to_legacy_cache(past_key_values):
+    """Returns the key/value states as a tuple of (key, value) tensors per layer."""
+    if hasattr(past_key_values, "to_legacy_cache"):
+        return past_key_values.to_legacy_cache()
+    return past_key_values
+
+
+def from_legacy_cache(past_key_values):
+    """Wraps the (key, value) tensors per layer into the cache object expected by the model.
+
+    The model appends the new states with torch.cat, so the wrapped tensors are never modified.
+    """
+    if DynamicCache is not None:
+        return DynamicCache.from_legacy_cache(past_key_values)
+    return past_key_values
+
+
+def get_cache_size(past_key_values) -> int:
+    """Returns the memory used by the key/value states in bytes."""
+    return sum(tensor.numel() * tensor.element_size() for layer in past_key_values for tensor in layer)
+
+
+class PrefixKVCache:
+    """LRU cache of the attention key/value states of prompt prefixes, bounded by memory.
+
+    Entries are keyed by the prefix token ids, so a hit is always valid for the prompt: the states
+    of a causal model only depend on the tokens before them.
+    """
+
+    def __init__(self, max_memory_mb: float):
+        self.max_memory = max_memory_mb * 1024 ** 2
+        self.memory = 0
+        self.hits = 0
+        self.lookups = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, prompt_ids: List[int], prefix_lengths: List[int]) -> Tuple[int, Optional[Tuple]]:
+        """Returns the longest cached prefix of the prompt among the candidate prefix lengths.
+
+        Args:
+        prompt_ids (list of int): the prompt token ids.
+        prefix_lengths (list of int): the candidate prefix lengths, in tokens.
+
+        Returns:
+        tuple: the cached prefix length and its key/value states, (0, None) on a miss.
+        """
+        with self._lock:
+            self.lookups += 1
+            for length in sorted(prefix_lengths, reverse=True):
+                key = tuple(prompt_ids[:length])
+                if key in self._entries:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return length, self._entries[key][0]
+
+        return 0, None
+
+    def put(self, prefix_ids: List[int], past_key_values) -> None:
+        size = get_cache_size(past_key_values)
+        if size > self.max_memory:
+            return
+
+        key = tuple(prefix_ids)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+
+            self._entries[key] = (past_key_values, size)
+            self.memory += size
+            while self.memory > self.max_memory:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.memory -= evicted_size
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "memory_mb": self.memory / 1024 ** 2,
+                "max_memory_mb": self.max_memory / 1024 ** 2,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            }
+
+
+def left_pad_cache(rows_past_key_values: List[Tuple], length: int) -> Tuple:
+    """Left pads each row key/value states to `length` and stacks them into a batch.
+
+    Args:
+    rows_past_key_values (list of tuple): the key/value states of each row, batch size 1.
+    length (int): the padded sequence length, the sequence dimension being the third one.
+
+    Returns:
+    tuple: the batched (key, value) tensors per layer.
+    """
+    nb_layers = len(rows_past_key_values[0])
+
+    return tuple(
+        tuple(
+            torch.cat([F.pad(row[layer][i], (0, 0, length - row[layer][i].shape[2], 0)) for row in rows_past_key_values], dim=0)
+            for i in range(2)
+        )
+        for layer in range(nb_layers)
+    )
+
+
+def prefill_with_cache(model, requests, kv_cache: PrefixKVCache, pad_token_id: int):
+    """Prefills the prompts together from their longest cached prefix and caches their new prefixes.
+
+    The cached states of each row are left padded to the longest cached prefix, and the uncached
+    suffixes are left padded and prefilled on top of them in a single forward pass, each row
+    laid out as [padding, cached prefix, padding, suffix]. When no row hits the cache, this is the
+    plain batched prefill. The states of the longer candidate prefixes are then sliced out of the
+    batch states and cached.
+
+    Args:
+    model: the causal language model.
+    requests (list of GenerationRequest): the batch, with their `prefix_lengths`.
+    kv_cache (PrefixKVCache): the prefix cache.
+    pad_token_id (int): the padding token id.
+
+    Returns:
+    tuple: the last position logits (batch, vocab), the batched key/value states, the attention
+    mask over the states, the last position ids (batch, 1) and the cached length of each prompt.
+    """
+    device = model.device
+    lookups = []
+
+    for request in requests:
+        prefix_lengths = [length for length in request.prefix_lengths if 0 < length < len(request.prompt_ids)]
+        cached_length, past_key_values = kv_cache.lookup(request.prompt_ids, prefix_lengths)
+        metrics.inc("kv_cache_lookups_total", result="hit" if cached_length else "miss")
+        lookups.append((cached_length, past_key_values, prefix_lengths))
+
+    batch_size = len(requests)
+    cached_region = max(cached_length for cached_length, _, _ in lookups)
+    suffix_region = max(len(request.prompt_ids) - cached_length for request, (cached_length, _, _) in zip(requests, lookups))
+    length = cached_region + suffix_region
+
+    input_ids = torch.full((batch_size, suffix_region), pad_token_id, dtype=torch.long)
+    position_ids = torch.zeros((batch_size, suffix_region), dtype=torch.long)
+    attention_mask = torch.zeros((batch_size, length), dtype=torch.long)
+    for row, (request, (cached_length, _, _)) in enumerate(zip(requests, lookups)):
+        suffix = request.prompt_ids[cached_length:]
+        input_ids[row, suffix_region - len(suffix):] = torch.tensor(suffix)
+        position_ids[row, suffix_region - len(suffix):] = torch.arange(cached_length, len(request.prompt_ids))
+        attention_mask[row, cached_region - cached_length:cached_region] = 1
+        attention_mask[row, length - len(suffix):] = 1
+
+    past_key_values = None
+    if cached_region:
+        reference = next(row_past_key_values for _, row_past_key_values, _ in lookups if row_past_key_values is not None)
+        empty = tuple(tuple(tensor[:, :, :0] for tensor in layer) for layer in reference)
+        past_key_values = from_legacy_cache(left_pad_cache([row_past_key_values if row_past_key_values is not None else empty for _, row_past_key_values, _ in lookups], cached_region))
+
+    attention_mask = attention_mask.to(device)
+    outputs = model(
+        input_ids=input_ids.to(device),
+        attention_mask=attention_mask,
+        position_ids=position_ids.to(device),
+        past_key_values=past_key_values,
+        use_cache=True,
+    )
+    batch_past_key_values = to_legacy_cache(outputs.past_key_values)
+
+    # the states of a row prefix are its cached states followed by the first states of its suffix
+    for row, (request, (cached_length, _, prefix_lengths)) in enumerate(zip(requests, lookups)):
+        suffix_start = length - (len(request.prompt_ids) - cached_length)
+        for end in sorted(prefix_length for prefix_length in prefix_lengths if prefix_length > cached_length):
+            kv_cache.put(request.prompt_ids[:end], tuple(
+                tuple(
+                    torch.cat([
+                        tensor[row:row + 1, :, cached_region - cached_length:cached_region],
+                        tensor[row:row + 1, :, suffix_start:suffix_start + end - cached_length],
+                    ], dim=2)
+                    for tensor in layer
+                )
+                for layer in batch_past_key_values
+            ))
+
+    cached_lengths = [cached_length for cached_length, _, _ in lookups]
+    return outputs.logits[:, -1, :], from_legacy_cache(batch_past_key_values), attention_mask, position_ids[:, -1:].to(device), cached_lengths
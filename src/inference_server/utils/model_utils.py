@@ -0,0 +1,103 @@
+import torch
+from transformers import BitsAndBytesConfig, AutoModelForCausalLM, AutoTokenizer
+from typing import Dict
+
+from src.utils.logger import get_console_logger
+
+logger = get_console_logger()
+
+def get_model_name(CONFIG) -> str:
+    """Returns the small model name when `use_small_model` is set (tests, CI), the main model name otherwise."""
+    if CONFIG["model"]["use_small_model"]:
+        return CONFIG["model"]["small_model_name"]
+    return CONFIG["model"]["model_name"]
+
+def get_cuda_model(CONFIG, model_name: str):
+    quantization_config = BitsAndBytesConfig(
+        load_in_4bit=CONFIG["model"]["quantization_config"]["load_in_4bit"],
+        bnb_4bit_compute_dtype=getattr(torch, CONFIG["model"]["quantization_config"]["bnb_4bit_compute_dtype"]),
+        bnb_4bit_quant_type=CONFIG["model"]["quantization_config"]["bnb_4bit_quant_type"],
+        bnb_4bit_use_double_quant=CONFIG["model"]["quantization_config"]["bnb_4bit_use_double_quant"],
+    )
+
+    return AutoModelForCausalLM.from_pretrained(
+        model_name,
+        torch_dtype=torch.float16,
+        trust_remote_code=CONFIG["model"]["config"]["trust_remote_code"],
+        device_map=CONFIG["model"]["config"]["device_map"],
+        quantization_config=quantization_config
+    )
+
+def get_cpu_model(CONFIG, model_name: str):
+    """Loads the model on CPU with int8 or int4 weights.
+
+    - int8 uses PyTorch dynamic quantization of the linear layers (float32 activations).
+    - int4 uses optimum-quanto weight-only quantization, the activations stay in `compute_dtype`.
+    - none keeps the `compute_dtype` weights.
+
+    `compute_dtype` defaults to float32: bfloat16 matmuls are only fast on CPUs with AVX512-BF16
+    or AMX and are emulated elsewhere.
+
+    Args:
+    CONFIG (dict): the 'main.yml' configuration.
+    model_name (str): the model to load.
+
+    Returns:
+    the quantized model.
+    """
+    cpu_config = CONFIG["model"]["cpu"]
+    quantization = cpu_config["quantization"]
+
+    if cpu_config["num_threads"]:
+        torch.set_num_threads(cpu_config["num_threads"])
+    logger.info(f"CPU inference with {torch.get_num_threads()} threads and {quantization} weights")
+
+    # Dynamic int8 quantization only supports float32 activations
+    compute_dtype = torch.float32 if quantization == "int8" else getattr(torch, cpu_config["compute_dtype"])
+
+    model = AutoModelForCausalLM.from_pretrained(
+        model_name,
+        torch_dtype=compute_dtype,
+        trust_remote_code=CONFIG["model"]["config"]["trust_remote_code"],
+        low_cpu_mem_usage=True,
+    )
+
+    if quantization == "int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif quantization == "int4":
+        try:
+            from optimum.quanto import quantize, freeze, qint4
+        except ImportError:
+            raise ImportError("int4 CPU quantization requires optimum-quanto: poetry install --extras cpu-int4 (or pip install optimum-quanto)")
+        quantize(model, weights=qint4)
+        freeze(model)
+    elif quantization != "none":
+        raise ValueError(f"Unknown CPU quantization {quantization}, expected one of: none, int8, int4")
+
+    return model
+
+def get_model_and_tokenizer(CONFIG):
+    model_name = get_model_name(CONFIG)
+    backend = CONFIG["model"]["backend"]
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    tokenizer.pad_token = tokenizer.eos_token
+
+    if backend == "cuda":
+        model = get_cuda_model(CONFIG, model_name)
+    elif backend == "cpu":
+        model = get_cpu_model(CONFIG, model_name)
+    else:
+        raise ValueError(f"Unknown model backend {backend}, expected one of: cuda, cpu")
+    model.eval()
+
+    return model, tokenizer
+
+def get_generation_params(CONFIG) -> Dict:
+    return {
+        "max_new_tokens": CONFIG["model"]["max_new_tokens"],
+        "temperature": CONFIG["model"]["temperature"],
+        "top_p": CONFIG["model"]["top_p"],
+        "do_sample": CONFIG["model"]["do_sample"],
+        "repetition_penalty": CONFIG["model"]["repetition_penalty"],
+    }
@@ -0,0 +1,189 @@
+import re
+import unicodedata
+from typing import List, Dict, Optional
+
+from langchain import PromptTemplate
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from langchain_community.vectorstores import Qdrant
+from langchain_community.embeddings import SentenceTransformerEmbeddings
+
+from src.utils.logger import get_console_logger
+
+logger = get_console_logger()
+
+def get_prompt_template(CONFIG):
+    return PromptTemplate(template=CONFIG["prompt"]["prompt_template"], input_variables=CONFIG["prompt"]["input_variable"])
+
+def create_vector_store(CONFIG):
+    client = QdrantClient(url=CONFIG["qdrant"]["url"], prefer_grpc=False)
+    embeddings = SentenceTransformerEmbeddings(model_name=CONFIG["qdrant"]["embeddings_model_name"])
+    return Qdrant(client=client, embeddings=embeddings,collection_name=CONFIG["qdrant"]["collection_name"])
+
+def normalize_text(text: str, lowercase: bool = True) -> str:
+    """Removes the accents and replaces the punctuation with spaces.
+
+    Args:
+    text (str): the text to normalize.
+    lowercase (bool): also lowercases the text.
+
+    Returns:
+    str: the normalized text, padded with spaces to ease whole word matching.
+    """
+    if lowercase:
+        text = text.lower()
+    text = unicodedata.normalize("NFKD", text.replace("’", "'"))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " " + " ".join(re.sub(r"[^\w&]+", " ", text).split()) + " "
+
+def extract_artists(prompt: str, artists_names: List[str], ambiguous_names: Optional[List[str]] = None) -> List[str]:
+    """Returns the artists mentioned in the prompt.
+
+    The longest names are matched first so that "Kalash Criminel" is not also matched as "Kalash".
+    Many single word names are also common words ("Souffrance", "Sniper", "Django", "Fresh"...),
+    so they are only matched when the prompt does not write them in lowercase: "un texte sur la
+    souffrance" does not filter on the artist, "un son de Souffrance" or "SNIPER" does. The
+    multi-word names are matched whatever their case, except the `ambiguous_names`.
+
+    Args:
+    prompt (str): the user prompt.
+    artists_names (list of str): the known artists names.
+    ambiguous_names (list of str): the multi-word artists names that are also common phrases
+    ("La Clinique"), matched case-sensitively.
+
+    Returns:
+    list of str: the artists names found in the prompt.
+    """
+    text = normalize_text(prompt, lowercase=False)
+    ambiguous_names = set(ambiguous_names or [])
+    artists = []
+
+    for artist_name in sorted(artists_names, key=len, reverse=True):
+        normalized_name = normalize_text(artist_name, lowercase=False)
+        if not normalized_name.strip():
+            continue
+
+        pattern = re.compile(re.escape(normalized_name), 0 if artist_name in ambiguous_names else re.IGNORECASE)
+        single_word = len(artist_name.split()) == 1
+        matches = [match for match in pattern.finditer(text) if not (single_word and match.group().islower())]
+        if matches:
+            artists.append(artist_name)
+            for match in reversed(matches):
+                text = text[:match.start()] + " " + text[match.end():]
+
+    return artists
+
+def extract_emotions(prompt: str, emotions: List[str], emotions_keywords: Dict[str, List[str]]) -> List[str]:
+    """Returns the FEEL emotions mentioned in the prompt, either by name or through one of their keywords.
+
+    Args:
+    prompt (str): the user prompt.
+    emotions (list of str): the FEEL emotions.
+    emotions_keywords (dict): extra keywords for each emotion.
+
+    Returns:
+    list of str: the emotions found in the prompt.
+    """
+    text = normalize_text(prompt)
+
+    return [
+        emotion for emotion in emotions
+        if any(normalize_text(keyword) in text for keyword in [emotion, *emotions_keywords.get(emotion, [])])
+    ]
+
+def build_metadata_filter(artists: List[str], emotions: List[str]) -> Optional[models.Filter]:
+    """Builds the Qdrant pre-filter matching the requested artists and emotions.
+
+    Args:
+    artists (list of str): the artists to keep.
+    emotions (list of str): the emotions to keep.
+
+    Returns:
+    Filter: the Qdrant filter, None when there is nothing to filter on.
+    """
+    conditions = []
+    if artists:
+        conditions.append(models.FieldCondition(key="metadata.artist_name", match=models.MatchAny(any=artists)))
+    if emotions:
+        conditions.append(models.FieldCondition(key="metadata.main_sentiment", match=models.MatchAny(any=emotions)))
+
+    return models.Filter(must=conditions) if conditions else None
+
+def retrieve_documents(db, CONFIG, prompt: str):
+    """Searches the documents closest to the prompt, pre-filtered on the artists and emotions it
+    mentions.
+
+    When the filters leave fewer than k documents (e.g. an artist without any song of that
+    emotion), the emotion filter and then the artist filter are dropped to complete the results.
+
+    Args:
+    db (Qdrant): the vector store.
+    CONFIG (dict): the 'main.yml' configuration.
+    prompt (str): the user prompt.
+
+    Returns:
+    list of Document: the retrieved documents, the most filtered ones first.
+    """
+    artists = extract_artists(prompt, CONFIG["artists"]["names"], CONFIG["qdrant"]["ambiguous_artists_names"])
+    emotions = extract_emotions(prompt, CONFIG["preprocessor"]["emotions"], CONFIG["qdrant"]["emotions_keywords"])
+    logger.info(f"Retrieval filters: artists={artists} emotions={emotions}")
+
+    k = CONFIG["qdrant"]["search_kwargs"]["k"]
+    filters = [(artists, emotions)]
+    if emotions:
+        filters.append((artists, []))
+    if artists:
+        filters.append(([], []))
+
+    documents, seen = [], set()
+    for filter_artists, filter_emotions in filters:
+        search_kwargs = {**CONFIG["qdrant"]["search_kwargs"], "filter": build_metadata_filter(filter_artists, filter_emotions)}
+        for document in db.similarity_search(prompt, **search_kwargs):
+            key = (document.page_content, tuple(sorted(document.metadata.items())))
+            if len(documents) < k and key not in seen:
+                seen.add(key)
+                documents.append(document)
+        if len(documents) >= k:
+            break
+        logger.info(f"Only {len(documents)} documents with artists={filter_artists} emotions={filter_emotions}, relaxing the filters")
+
+    return documents
+
+def get_context(documents) -> str:
+    return "\n\n".join(document.page_content for document in documents)
+
+def build_prompt(prompt: str, context: str, prompt_template) -> str:
+    """Stuffs the context into the prompt template.
+
+    Args:
+    prompt (str): the user prompt.
+    context (str): the retrieved documents (see get_context) or the rhymes found in the lyrics.
+    prompt_template (PromptTemplate): the template with the context and question variables.
+
+    Returns:
+    str: the prompt sent to the LLM.
+    """
+    return prompt_template.format(context=context, question=prompt)
+
+def get_prompt_prefixes(context: str, prompt_template, cache_context: bool) -> List[str]:
+    """Returns the prefixes of the prompt that are shared between requests: the static part of
+    the template before the context and, optionally, the template with the same context before
+    the question.
+
+    Args:
+    context (str): the context stuffed into the prompt.
+    prompt_template (PromptTemplate): the template with the context and question variables.
+    cache_context (bool): also returns the prefix ending after the context.
+
+    Returns:
+    list of str: the prompt prefixes, shortest first.
+    """
+    template = prompt_template.template
+    context_start = template.index("{context}")
+    question_start = template.index("{question}")
+    prefixes = [template[:context_start]]
+
+    if cache_context and context_start < question_start:
+        prefixes.append(template[:context_start] + context + template[context_start + len("{context}"):question_start])
+
+    return prefixes
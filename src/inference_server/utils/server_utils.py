@@ -0,0 +1,167 @@
+import json
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.utils.metrics import get_metrics
+from src.utils.logger import get_console_logger
+from src.inference_server.utils.batching_utils import QueueFullError
+from src.inference_server.utils.retrieval_utils import retrieve_documents, extract_artists, get_context, build_prompt, get_prompt_prefixes
+from src.rhyme_index.utils.rhyme_index_utils import parse_rhyme_query, format_rhyme_context
+
+logger = get_console_logger()
+metrics = get_metrics()
+
+
+def create_handler(CONFIG, batcher, db, prompt_template, rhyme_index=None):
+    """Creates the HTTP handler of the inference server.
+
+    Routes:
+    - POST /generate with a {"prompt": str} body: streams the generated text back as chunks,
+      answers 503 with a Retry-After header when the generation queue is full. The rhyme queries
+      (e.g. "rimes en -ouille pour Jul") get the rhymes found in the lyrics as context instead of
+      the vector search results.
+    - GET /rhymes?q=<prompt>: returns the rhymes found in the lyrics for a rhyme query, without
+      generation.
+    - GET /health: returns the generation queue depth and the prefix cache statistics.
+    - GET /metrics: returns the process metrics in the Prometheus text format.
+
+    Args:
+    CONFIG (dict): the 'main.yml' configuration.
+    batcher (DynamicBatcher): the started batcher.
+    db (Qdrant): the vector store used to retrieve the context.
+    prompt_template (PromptTemplate): the prompt template.
+    rhyme_index (RhymeIndex): the rhyme index, the rhyme queries use the vector search when None.
+
+    Returns:
+    type: the BaseHTTPRequestHandler subclass.
+    """
+    request_timeout = CONFIG["inference_server"]["request_timeout"]
+    retry_after = CONFIG["inference_server"]["retry_after"]
+    cache_context = CONFIG["inference_server"]["kv_cache"]["cache_context"]
+    rhyme_config = CONFIG["rhyme_index"]
+
+    def get_rhymes(prompt: str):
+        target = parse_rhyme_query(prompt) if rhyme_index is not None else None
+        if target is None:
+            return None, []
+
+        with metrics.span("rhyme_lookup"):
+            artists = extract_artists(prompt, CONFIG["artists"]["names"], CONFIG["qdrant"]["ambiguous_artists_names"])
+            rhymes = rhyme_index.query(target, artists, rhyme_config["max_words"], rhyme_config["max_examples"])
+        metrics.inc("rhyme_queries_total", result="hit" if rhymes else "miss")
+        logger.info(f"Rhyme query: target={target} artists={artists}, {len(rhymes)} rhymes found")
+        return target, rhymes
+
+    def get_prompt_context(prompt: str) -> str:
+        if rhyme_config["inject_in_prompt"]:
+            target, rhymes = get_rhymes(prompt)
+            if rhymes:
+                return format_rhyme_context(target, rhymes)
+
+        with metrics.span("retrieval"):
+            return get_context(retrieve_documents(db, CONFIG, prompt))
+
+    class InferenceHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def _send_json(self, status: int, data, headers=None) -> None:
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _refuse(self, message: str) -> None:
+            logger.info(f"Request refused: {message}")
+            self._send_json(503, {"error": message}, {"Retry-After": str(retry_after)})
+
+        def _write_chunk(self, text: str) -> None:
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/rhymes":
+                prompt = parse_qs(url.query).get("q", [""])[0]
+                target, rhymes = get_rhymes(prompt)
+                self._send_json(200, {"target": target, "rhymes": rhymes})
+                return
+
+            if self.path == "/metrics":
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            if self.path != "/health":
+                self._send_json(404, {"error": "not found"})
+                return
+            health = {"queue_depth": batcher.queue.qsize(), "max_queue_size": batcher.queue.maxsize}
+            if batcher.kv_cache is not None:
+                health["kv_cache"] = batcher.kv_cache.get_stats()
+            self._send_json(200, health)
+
+        def do_POST(self):
+            if self.path != "/generate":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                prompt = json.loads(self.rfile.read(length))["prompt"]
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {"error": "expected a JSON body with a 'prompt' field"})
+                return
+
+            # refuse before the retrieval when the queue is already full, submit still checks it
+            if batcher.queue.full():
+                metrics.inc("generation_requests_total", status="rejected")
+                self._refuse(f"{batcher.queue.maxsize} requests already waiting")
+                return
+
+            context = get_prompt_context(prompt)
+            try:
+                request = batcher.submit(
+                    build_prompt(prompt, context, prompt_template),
+                    get_prompt_prefixes(context, prompt_template, cache_context),
+                )
+            except QueueFullError as e:
+                self._refuse(str(e))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            try:
+                with metrics.span("generation_request"):
+                    for text in request.stream(timeout=request_timeout):
+                        self._write_chunk(text)
+                    self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                logger.info("Client disconnected, cancelling its generation")
+                request.cancelled.set()
+            except Exception:
+                logger.exception("Generation failed")
+                request.cancelled.set()
+                self.close_connection = True
+
+    return InferenceHandler
+
+
+def create_server(CONFIG, batcher, db, prompt_template, rhyme_index=None) -> ThreadingHTTPServer:
+    handler = create_handler(CONFIG, batcher, db, prompt_template, rhyme_index)
+    server = ThreadingHTTPServer((CONFIG["inference_server"]["host"], CONFIG["inference_server"]["port"]), handler)
+    server.daemon_threads = True
+    return server
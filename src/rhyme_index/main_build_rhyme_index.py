@@ -0,0 +1,45 @@
+from src.paths import DATA_DIR
+from src.utils.metrics import configure_metrics
+from src.utils.logger import get_console_logger
+from src.utils.file_utils import get_config, read_songs_json_files, get_artists_names_mapping
+from src.rhyme_index.utils.rhyme_index_utils import get_rhyme_entries, write_rhyme_index
+
+logger = get_console_logger()
+
+def main(CONFIG=None):
+    """
+    Main script to build the rhyme index used for the ghost writing suggestions.
+    
+    The script performs the following operations:
+    - Loads the songs and takes the last word of each line of their sections (see
+      extract_verse_refrain).
+    - Computes an approximate French pronunciation of each word and its rhyme keys: the rime
+      (last vowel sound and the following consonants) and the assonance (last vowel sound).
+    - Saves an inverted index from each rime to its words, their number of lines per artist and
+      an example line, read back with memory mapping by the inference server (see RhymeIndex).
+    
+    Configuration for the script, including the index path, 
+    is loaded from a 'main.yml' file.
+    
+    Returns:
+        None
+    """
+    
+    if CONFIG is None:
+        CONFIG = get_config("main.yml")
+    metrics = configure_metrics(CONFIG, "rhyme_index")
+
+    with metrics.span("rhyme_index_step", step="read_songs"):
+        songs_data = read_songs_json_files(f"{DATA_DIR}/raw")
+    logger.info(f'Loaded {len(songs_data)} songs')
+
+    with metrics.span("rhyme_index_step", step="get_rhyme_entries"):
+        entries = get_rhyme_entries(songs_data, get_artists_names_mapping(CONFIG["artists"]["names"]))
+    metrics.inc("songs_processed_total", len(songs_data), stage="rhyme_index", status="ok")
+
+    with metrics.span("rhyme_index_step", step="write_index"):
+        stats = write_rhyme_index(entries, DATA_DIR / CONFIG["rhyme_index"]["path"])
+    logger.info(f"Rhyme index saved: {stats['nb_keys']} rimes, {stats['nb_words']} words, {stats['size_bytes'] / 1024:.0f}KB")
+  
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import re
+from typing import List, Optional, Tuple
+
+VOWELS = set("aeiouyàâäéèêëîïôöùûüœæ")
+
+# Phonemes, written with one character each so that the keys stay short:
+# a, e (é), E (è), i, o, O (on), A (an), I (in), u (ou), y (u), 2 (eu), @ (mute e),
+# and the consonants, with S (ch), Z (j), N (gn), j (ill), w (oi).
+VOWEL_PHONEMES = set("aeEioOAIuy2@")
+
+# Ordered grapheme rules, the first matching rule wins. A rule is (grapheme, phonemes, condition)
+# where the condition is checked on what follows the grapheme:
+# - "end": nothing, the grapheme ends the word
+# - "nasal": the next letter is not a vowel nor n/m (or there is no next letter)
+# - "soft": the next letter is e, i or y
+# - "vowel": the next letter is a vowel
+GRAPHEME_RULES = [
+    ("eaux", "o", None), ("eau", "o", None),
+    ("aient", "E", "end"),
+    ("ouill", "uj", None), ("aill", "aj", None), ("eill", "Ej", None), ("euill", "2j", None), ("ill", "ij", None),
+    ("ouil", "uj", "end"), ("ail", "aj", "end"), ("eil", "Ej", "end"), ("euil", "2j", "end"),
+    ("tion", "sjO", "end"),
+    ("oin", "wI", "nasal"), ("ien", "jI", "nasal"),
+    ("ain", "I", "nasal"), ("aim", "I", "nasal"), ("ein", "I", "nasal"),
+    ("an", "A", "nasal"), ("am", "A", "nasal"), ("en", "A", "nasal"), ("em", "A", "nasal"),
+    ("on", "O", "nasal"), ("om", "O", "nasal"),
+    ("in", "I", "nasal"), ("im", "I", "nasal"), ("yn", "I", "nasal"), ("ym", "I", "nasal"),
+    ("un", "I", "nasal"), ("um", "I", "nasal"),
+    ("oi", "wa", None), ("oî", "wa", None), ("oy", "waj", None),
+    ("ou", "u", None), ("où", "u", None), ("oû", "u", None),
+    ("au", "o", None), ("ai", "E", None), ("aî", "E", None), ("ei", "E", None), ("ay", "Ej", None),
+    ("eu", "2", None), ("œu", "2", None), ("œ", "2", None),
+    ("er", "e", "end"), ("ez", "e", "end"), ("et", "E", "end"), ("es", "e", "end"),
+    ("é", "e", None), ("è", "E", None), ("ê", "E", None), ("ë", "E", None),
+    ("a", "a", None), ("à", "a", None), ("â", "a", None),
+    ("o", "o", None), ("ô", "o", None),
+    ("i", "i", None), ("î", "i", None), ("ï", "i", None), ("y", "i", None),
+    ("u", "y", None), ("û", "y", None), ("ù", "y", None), ("ü", "y", None),
+    ("e", "@", None),
+    ("sch", "S", None), ("ch", "S", None), ("gn", "N", None), ("ph", "f", None), ("th", "t", None),
+    ("qu", "k", None), ("gu", "g", "soft"), ("ge", "Z", "vowel"),
+    ("ck", "k", None), ("cc", "k", None), ("ç", "s", None),
+    ("c", "s", "soft"), ("c", "k", None),
+    ("g", "Z", "soft"), ("g", "g", None), ("j", "Z", None),
+    ("ss", "s", None), ("x", "ks", None), ("h", "", None),
+]
+
+SILENT_FINALS = "tdpgsxz"
+# the determiners and pronouns ending in a pronounced "es"
+SHORT_ES_WORDS = {"les", "des", "mes", "tes", "ses", "ces", "es"}
+
+
+def normalize_word(word: str) -> str:
+    """Lowercases the word and keeps its letters, the part after an apostrophe (l'amour -> amour)."""
+    word = word.lower().replace("’", "'").split("'")[-1]
+    return re.sub(r"[^a-zàâäéèêëîïôöùûüçœæ]", "", word)
+
+
+def _matches(condition: Optional[str], word: str, end: int) -> bool:
+    next_letter = word[end] if end < len(word) else ""
+    if condition is None:
+        return True
+    if condition == "end":
+        return next_letter == ""
+    if condition == "nasal":
+        return next_letter == "" or (next_letter not in VOWELS and next_letter not in "nmh")
+    if condition == "soft":
+        return next_letter in ("e", "i", "y", "é", "è", "ê")
+    if condition == "vowel":
+        return next_letter in VOWELS
+    raise ValueError(f"Unknown grapheme condition {condition}")
+
+
+def to_phonemes(word: str) -> str:
+    """Approximates the French pronunciation of a word.
+
+    This is a rule based approximation (no dictionary): nasal vowels, common digraphs, soft c/g,
+    silent final consonants and mute final e are handled, the exceptions are not.
+
+    Args:
+    word (str): the word to transcribe.
+
+    Returns:
+    str: the phonemes, one character each (see VOWEL_PHONEMES).
+    """
+    word = normalize_word(word)
+
+    # plural and silent final consonants: "chats" -> "cha", "grand" -> "gran", but "les", "mes"
+    while len(word) > 2 and word[-1] in SILENT_FINALS and word[-2:] not in ("ez", "et", "ss") and not word.endswith("aient") and word not in SHORT_ES_WORDS:
+        word = word[:-1]
+
+    phonemes = []
+    idx = 0
+    while idx < len(word):
+        for grapheme, phoneme, condition in GRAPHEME_RULES:
+            end = idx + len(grapheme)
+            if word.startswith(grapheme, idx) and _matches(condition, word, end):
+                phonemes.append(phoneme)
+                idx = end
+                break
+        else:
+            letter = word[idx]
+            # double consonants are pronounced once
+            if not (phonemes and phonemes[-1] == letter):
+                phonemes.append(letter)
+            idx += 1
+
+    phonemes = "".join(phonemes)
+    # the s between two vowels is voiced
+    phonemes = re.sub(r"(?<=[aeEioOAIuy2@])s(?=[aeEioOAIuy2@])", "z", phonemes)
+    # the final mute e is not pronounced, unless it is the only vowel: "le", "que"
+    if phonemes.endswith("@") and any(phoneme in VOWEL_PHONEMES for phoneme in phonemes[:-1]):
+        phonemes = phonemes[:-1]
+    # the e of the last syllable is open when followed by a pronounced consonant: "ciel", "belle"
+    phonemes = re.sub(r"@([^aeEioOAIuy2@]+)$", r"E\1", phonemes)
+
+    return phonemes
+
+
+def get_rhyme_keys(word: str) -> Tuple[str, str]:
+    """Returns the rhyme keys of a word: its rime (last vowel sound and the following
+    consonants) and its assonance (last vowel sound only).
+
+    Args:
+    word (str): the word.
+
+    Returns:
+    tuple: the rime and assonance keys, empty strings when the word has no vowel sound.
+    """
+    phonemes = to_phonemes(word)
+
+    for idx in range(len(phonemes) - 1, -1, -1):
+        if phonemes[idx] in VOWEL_PHONEMES:
+            return phonemes[idx:], phonemes[idx]
+
+    return "", ""
+
+
+def get_last_word(line: str) -> Optional[str]:
+    """Returns the last word of a lyrics line, ignoring the backing vocals in parentheses."""
+    line = re.sub(r"\([^)]*\)|\[[^\]]*\]", " ", line)
+    words = re.findall(r"[\w’'-]+", line)
+    for word in reversed(words):
+        word = normalize_word(word)
+        if word:
+            return word
+
+    return None
+
+
+def get_lines(section_texts: List[str]) -> List[str]:
+    return [line.strip() for text in section_texts for line in text.split("\n") if line.strip()]
@@ -0,0 +1,213 @@
+import os
+import re
+import mmap
+import json
+import zlib
+import struct
+from collections import defaultdict
+from typing import List, Dict, Optional
+
+from src.utils.file_utils import SECTIONS
+from src.rhyme_index.utils.phonetics_utils import get_rhyme_keys, get_last_word, get_lines
+
+MAGIC = b"RHYMIDX1"
+HEADER_LENGTH = struct.Struct("<I")
+
+RHYME_QUERY_PATTERN = re.compile(r"\b(?:rimes?|riment|rimer|rimant)\s+(en|avec|sur|par)\s+(.*)", re.IGNORECASE | re.DOTALL)
+# an ending ("-ouille") or a quoted word ("« nuit »")
+EXPLICIT_TARGET_PATTERN = re.compile(r"^\s*(?:-|[«\"“]\s*-?)\s*([\w’'-]+)")
+WORD_PATTERN = re.compile(r"[\w’'-]+")
+
+DETERMINERS = {
+    "le", "la", "les", "l", "un", "une", "des", "du", "de", "d", "au", "aux",
+    "ce", "cet", "cette", "ces", "ma", "ta", "sa", "mon", "ton", "son", "mes", "tes", "ses",
+    "notre", "votre", "leur", "nos", "vos", "leurs", "quelques", "plusieurs",
+}
+
+
+def get_rhyme_entries(songs_data: List[Dict], artists_mapping: Dict[str, str]) -> Dict[str, Dict]:
+    """Groups the line-final words of the lyrics by rime key.
+
+    Args:
+    songs_data (list of dict): the songs loaded with read_songs_json_files.
+    artists_mapping (dict): mapping from the safe file names to the artists names.
+
+    Returns:
+    dict: A dict with the rime key as key and, as value, a dict with each word as key and a dict
+    with the artist name as key and [number of lines, example line] as value.
+    """
+    entries = defaultdict(lambda: defaultdict(dict))
+
+    for song in songs_data:
+        artist_name = artists_mapping.get(song["artist_name"], song["artist_name"])
+        section_texts = [text for section in SECTIONS for text in song.get(section, [])]
+        if not section_texts and song.get("lyrics"):
+            section_texts = [song["lyrics"]]
+
+        for line in get_lines(section_texts):
+            word = get_last_word(line)
+            if word is None:
+                continue
+            rime, _ = get_rhyme_keys(word)
+            if not rime:
+                continue
+
+            artists = entries[rime][word]
+            if artist_name in artists:
+                artists[artist_name][0] += 1
+            else:
+                artists[artist_name] = [1, line]
+
+    return entries
+
+
+def write_rhyme_index(entries: Dict[str, Dict], path: str) -> Dict:
+    """Writes the rhyme entries as an inverted index file, read back with RhymeIndex.
+
+    The file holds a magic number, the length of a JSON header and the data blocks. The header
+    lists the artists, the offset and size of the block of each rime key and the rime keys of
+    each assonance (last vowel sound). Each block is the zlib compressed JSON list of the words of
+    the key, most frequent first: [word, count, [[artist index, count, example line], ...]].
+
+    Args:
+    entries (dict): the entries returned by get_rhyme_entries.
+    path (str): the index file path.
+
+    Returns:
+    dict: the number of keys, words and the file size in bytes.
+    """
+    artists = sorted({artist_name for words in entries.values() for word_artists in words.values() for artist_name in word_artists})
+    artists_idx = {artist_name: idx for idx, artist_name in enumerate(artists)}
+
+    keys, assonances, blocks = {}, defaultdict(list), []
+    offset = 0
+    for rime in sorted(entries):
+        words = [
+            [word, sum(count for count, _ in word_artists.values()), [[artists_idx[artist_name], count, example] for artist_name, (count, example) in word_artists.items()]]
+            for word, word_artists in entries[rime].items()
+        ]
+        words.sort(key=lambda word: (-word[1], word[0]))
+        block = zlib.compress(json.dumps(words, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+        keys[rime] = [offset, len(block), sum(word[1] for word in words)]
+        # the rime starts with the assonance, its vowel sound
+        assonances[rime[0]].append(rime)
+        blocks.append(block)
+        offset += len(block)
+
+    header = json.dumps({"artists": artists, "keys": keys, "assonances": assonances}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+        for block in blocks:
+            f.write(block)
+
+    return {"nb_keys": len(keys), "nb_words": sum(len(words) for words in entries.values()), "size_bytes": os.path.getsize(path)}
+
+
+class RhymeIndex:
+    """Read-only rhyme index, memory mapped so that loading it only parses its header and the
+    blocks are read from the page cache when queried.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a rhyme index file")
+        (header_length,) = HEADER_LENGTH.unpack_from(self._mmap, len(MAGIC))
+        self._data_start = len(MAGIC) + HEADER_LENGTH.size + header_length
+        header = json.loads(self._mmap[len(MAGIC) + HEADER_LENGTH.size:self._data_start])
+
+        self.artists = header["artists"]
+        self.artists_idx = {artist_name: idx for idx, artist_name in enumerate(self.artists)}
+        self.keys = header["keys"]
+        self.assonances = header["assonances"]
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+    def _read_block(self, rime: str) -> List:
+        offset, size, _ = self.keys[rime]
+        start = self._data_start + offset
+        return json.loads(zlib.decompress(self._mmap[start:start + size]))
+
+    def query(self, target: str, artists: Optional[List[str]] = None, limit: int = 20, max_examples: int = 2) -> List[Dict]:
+        """Returns the words rhyming with a word or an ending, e.g. "grenouille" or "-ouille".
+
+        The words sharing the rime of the target are returned, or, when there is none, the words
+        sharing its assonance.
+
+        Args:
+        target (str): the word or ending to rhyme with.
+        artists (list of str): keeps only the lines of these artists, all the artists when empty.
+        limit (int): the maximum number of words.
+        max_examples (int): the maximum number of example lines per word.
+
+        Returns:
+        list of dict: the words, with their number of lines and example lines, most frequent first.
+        """
+        rime, assonance = get_rhyme_keys(target.lstrip("-"))
+        rimes = [rime] if rime in self.keys else self.assonances.get(assonance, [])
+        artists_idx = {self.artists_idx[artist_name] for artist_name in artists or [] if artist_name in self.artists_idx}
+        if artists and not artists_idx:
+            return []
+
+        results = []
+        for rime in rimes:
+            for word, count, word_artists in self._read_block(rime):
+                if artists_idx:
+                    word_artists = [artist for artist in word_artists if artist[0] in artists_idx]
+                    count = sum(artist[1] for artist in word_artists)
+                if count:
+                    results.append({
+                        "word": word,
+                        "count": count,
+                        "examples": [
+                            {"artist_name": self.artists[artist_idx], "line": example}
+                            for artist_idx, _, example in sorted(word_artists, key=lambda artist: -artist[1])[:max_examples]
+                        ],
+                    })
+
+        results.sort(key=lambda result: (-result["count"], result["word"]))
+        return results[:limit]
+
+
+def parse_rhyme_query(prompt: str) -> Optional[str]:
+    """Returns the word or ending a prompt asks rhymes for, None when the prompt is not a rhyme query.
+
+    An ending or a quoted word is always taken: "rimes en -ouille pour Jul" -> "ouille". Otherwise
+    the determiners are skipped, "un couplet qui rime avec la nuit" -> "nuit", and "sur" is only
+    read as a topic, "rimes sur le thème de la rue" -> None.
+    """
+    match = RHYME_QUERY_PATTERN.search(prompt)
+    if match is None:
+        return None
+
+    connector, rest = match.group(1).lower(), match.group(2)
+    explicit_target = EXPLICIT_TARGET_PATTERN.match(rest)
+    if explicit_target is not None:
+        return explicit_target.group(1).strip("-'’") or None
+    if connector == "sur":
+        return None
+
+    for word in WORD_PATTERN.findall(rest):
+        # "l'amour" is kept whole, get_rhyme_keys only reads the part after the apostrophe
+        word = word.strip("-'’")
+        if word and word.lower() not in DETERMINERS:
+            return word
+
+    return None
+
+
+def format_rhyme_context(target: str, results: List[Dict]) -> str:
+    """Formats the rhymes as the prompt context: one line per word with its example lines."""
+    lines = [f"Rhymes with \"{target}\" found in the lyrics:"]
+    for result in results:
+        examples = " / ".join(f"\"{example['line']}\" ({example['artist_name']})" for example in result["examples"])
+        lines.append(f"- {result['word']} ({result['count']}): {examples}")
+
+    return "\n".join(lines)
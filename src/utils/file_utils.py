@@ -6,6 +6,9 @@ from typing import List, Dict, Set
 
 from src.paths import CONFIG_DIR, DATA_DIR
 
+# the song sections saved by the crawler, see extract_verse_refrain
+SECTIONS = ["intro", "pre_chorus", "verses", "chorus", "outro"]
+
 def get_genius_cred(path):
     with open(CONFIG_DIR / path,) as f:
         genius_cred = json.load(f)
@@ -41,6 +44,23 @@ def read_songs_json_files(folder_path: str):
                     all_songs.append(song_details)
     return all_songs
 
+def get_safe_file_name(name: str) -> str:
+    return "".join(
+        c if c.isalnum() or c in " ._-()" else "_"
+        for c in name
+    )
+
+def get_artists_names_mapping(artists_names: List[str]) -> Dict[str, str]:
+    """Maps the safe file names used to store the lyrics back to the artists names.
+
+    Args:
+    artists_names (list of str): the artists names from the configuration.
+
+    Returns:
+    dict: A dict with the safe file name as key and the artist name as value.
+    """
+    return {get_safe_file_name(artist_name): artist_name for artist_name in artists_names}
+
 def write_json_file(data, file_path) -> None:
     with open(file_path, "w", encoding="utf-8") as file:
         json.dump(data, file, ensure_ascii=False, indent=4)
\ No newline at end of file
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from src.paths import DATA_DIR
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def format_labels(labels, extra=()) -> str:
+    labels = list(labels) + list(extra)
+    if not labels:
+        return ""
+    escaped = [(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for key, value in labels]
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+class Metrics:
+    """In-process counters, gauges, histograms and timing spans.
+
+    The spans are written to a JSON-lines file as they end, and `flush` writes the counters,
+    gauges and histograms both to the JSON-lines file and to a Prometheus text snapshot.
+    Recording a value is a dict update under a lock, cheap enough to be left on in production.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.jsonl_path = None
+        self.prometheus_path = None
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._jsonl_file = None
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def configure(self, enabled: bool = True, jsonl_path: Optional[str] = None, prometheus_path: Optional[str] = None) -> None:
+        """Sets the output files and starts a new run: the previous run, e.g. the previous stage of
+        `python -m src all`, is flushed to its own files and its values are reset."""
+        self.flush()
+        with self._lock:
+            self.counters, self.gauges, self.histograms = {}, {}, {}
+            self.enabled = enabled
+            self.jsonl_path = jsonl_path
+            self.prometheus_path = prometheus_path
+            if self._jsonl_file is not None:
+                self._jsonl_file.close()
+                self._jsonl_file = None
+            if enabled and jsonl_path:
+                os.makedirs(os.path.dirname(jsonl_path) or ".", exist_ok=True)
+                self._jsonl_file = open(jsonl_path, "a", encoding="utf-8")
+
+    def start_periodic_flush(self, interval_s: float) -> None:
+        """Flushes the metrics every `interval_s` seconds from a daemon thread, so that long
+        running processes (e.g. the inference server) keep their snapshot up to date."""
+        if self._flusher is not None or not interval_s:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval_s)
+                self.flush()
+
+        self._flusher = threading.Thread(target=run, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    @staticmethod
+    def _key(name: str, labels: Dict) -> Tuple:
+        return (name, tuple(sorted((key, str(value)) for key, value in labels.items())))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {"buckets": [0] * len(DEFAULT_BUCKETS), "sum": 0.0, "count": 0}
+            for idx, bound in enumerate(DEFAULT_BUCKETS):
+                if value <= bound:
+                    histogram["buckets"][idx] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def record_http_response(self, response, endpoint: str) -> None:
+        """Counts a `requests` response by endpoint and status code, with its size and latency."""
+        if not self.enabled:
+            return
+        self.inc("http_requests_total", endpoint=endpoint, status=response.status_code)
+        self.inc("http_response_bytes_total", len(response.content), endpoint=endpoint)
+        self.observe("http_request_seconds", response.elapsed.total_seconds(), endpoint=endpoint)
+
+    def _write_event(self, event: Dict) -> None:
+        if self._jsonl_file is not None:
+            self._jsonl_file.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+
+    @contextmanager
+    def span(self, name: str, item: Optional[str] = None, **labels):
+        """Times the enclosed block into the `<name>_seconds` histogram and writes a span event.
+
+        Args:
+        name (str): the span name, e.g. crawler_song.
+        item (str): the processed item, e.g. a song name. Only written to the span event, to keep
+            the histogram labels cardinality low.
+        labels: the span labels, e.g. stage.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self.observe(f"{name}_seconds", duration, **labels)
+            with self._lock:
+                self._write_event({"ts": time.time(), "type": "span", "name": name, "duration_s": duration, "status": status, "item": item, **labels})
+
+    def to_prometheus(self) -> str:
+        """Returns the counters, gauges and histograms in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for metrics, metric_type in [(self.counters, "counter"), (self.gauges, "gauge")]:
+                for name in sorted({name for name, _ in metrics}):
+                    lines.append(f"# TYPE {name} {metric_type}")
+                    for (metric_name, labels), value in sorted(metrics.items()):
+                        if metric_name == name:
+                            lines.append(f"{name}{format_labels(labels)} {value}")
+
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric_name, labels), histogram in sorted(self.histograms.items()):
+                    if metric_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(DEFAULT_BUCKETS, histogram["buckets"]):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{format_labels(labels, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_bucket{format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {histogram['sum']}")
+                    lines.append(f"{name}_count{format_labels(labels)} {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def flush(self) -> None:
+        """Writes the current values to the JSON-lines file and the Prometheus snapshot."""
+        if not self.enabled:
+            return
+
+        if self.prometheus_path:
+            os.makedirs(os.path.dirname(self.prometheus_path) or ".", exist_ok=True)
+            snapshot = self.to_prometheus()
+            with open(self.prometheus_path, "w", encoding="utf-8") as f:
+                f.write(snapshot)
+
+        with self._lock:
+            now = time.time()
+            for metrics, metric_type in [(self.counters, "counter"), (self.gauges, "gauge")]:
+                for (name, labels), value in metrics.items():
+                    self._write_event({"ts": now, "type": metric_type, "name": name, "value": value, **dict(labels)})
+            for (name, labels), histogram in self.histograms.items():
+                self._write_event({"ts": now, "type": "histogram", "name": name, "sum": histogram["sum"], "count": histogram["count"], **dict(labels)})
+            if self._jsonl_file is not None:
+                self._jsonl_file.flush()
+
+
+_METRICS = Metrics()
+atexit.register(_METRICS.flush)
+
+
+def get_metrics() -> Metrics:
+    return _METRICS
+
+
+def configure_metrics(CONFIG, run_name: str) -> Metrics:
+    """Configures the process metrics from the 'metrics' section of the configuration and starts
+    their periodic flush.
+
+    Args:
+    CONFIG (dict): the 'main.yml' configuration.
+    run_name (str): the name of the running script, used in the output file names.
+
+    Returns:
+    Metrics: the configured metrics.
+    """
+    metrics_dir = DATA_DIR / CONFIG["metrics"]["dir"]
+    _METRICS.configure(
+        enabled=CONFIG["metrics"]["enabled"],
+        jsonl_path=str(metrics_dir / f"{run_name}.jsonl"),
+        prometheus_path=str(metrics_dir / f"{run_name}.prom"),
+    )
+    if CONFIG["metrics"]["enabled"]:
+        _METRICS.start_periodic_flush(CONFIG["metrics"]["flush_interval_s"])
+    return _METRICS
@@ -0,0 +1,173 @@
+import os
+import json
+import hashlib
+import importlib
+from pathlib import Path
+from typing import List, Dict, Callable, NamedTuple
+
+from src.paths import PARENT_DIR, DATA_DIR, CONFIG_DIR
+from src.utils.metrics import get_metrics
+from src.utils.logger import get_console_logger
+
+logger = get_console_logger()
+
+STAGES_STATE_DIR = DATA_DIR / '.stages'
+
+
+class Stage(NamedTuple):
+    """A pipeline stage.
+
+    Attributes:
+    name (str): the stage name, also the CLI subcommand.
+    module (str): the module holding the stage `main(CONFIG)`, imported only when the stage runs.
+    config_sections (list of str): the 'main.yml' sections the stage reads.
+    inputs (callable): returns the input files and directories from the configuration.
+    outputs (callable): returns the output files and directories from the configuration.
+    code (list of str): the source directories of the stage, relative to the repository root.
+    cacheable (bool): whether the stage can be skipped when nothing changed.
+    """
+    name: str
+    module: str
+    config_sections: List[str]
+    inputs: Callable[[Dict], List[Path]]
+    outputs: Callable[[Dict], List[Path]]
+    code: List[str]
+    cacheable: bool = True
+
+
+STAGES = [
+    Stage(
+        name="discover",
+        module="src.data_crawler.main_get_artists_names",
+        config_sections=["spotipy"],
+        inputs=lambda CONFIG: [CONFIG_DIR / "spotify_cred.json"],
+        outputs=lambda CONFIG: [],
+        code=["src/data_crawler/main_get_artists_names.py", "src/data_crawler/utils/artists_names_utils.py"],
+    ),
+    Stage(
+        name="crawl",
+        module="src.data_crawler.main_get_lyrics",
+        config_sections=["artists", "genius"],
+        inputs=lambda CONFIG: [CONFIG_DIR / "genius_cred.json"],
+        outputs=lambda CONFIG: [PARENT_DIR / CONFIG["artists"]["lyrics_dir"]],
+        code=["src/data_crawler/main_get_lyrics.py", "src/data_crawler/utils/lyrics_utils.py"],
+    ),
+    Stage(
+        name="preprocess",
+        module="src.data_preprocessing.main_metadata_preprocessor",
+        config_sections=["preprocessor"],
+        inputs=lambda CONFIG: [DATA_DIR / "raw", DATA_DIR / CONFIG["preprocessor"]["emotions_csv_path"]],
+        outputs=lambda CONFIG: [DATA_DIR / CONFIG["preprocessor"]["save_path"]],
+        code=["src/data_preprocessing"],
+    ),
+    Stage(
+        name="ingest",
+        module="src.data_ingestion.ingest",
+        config_sections=["artists", "preprocessor", "qdrant"],
+        inputs=lambda CONFIG: [DATA_DIR / "raw", DATA_DIR / CONFIG["preprocessor"]["save_path"]],
+        outputs=lambda CONFIG: [],
+        code=["src/data_ingestion"],
+    ),
+    Stage(
+        name="rhymes",
+        module="src.rhyme_index.main_build_rhyme_index",
+        config_sections=["artists", "rhyme_index"],
+        inputs=lambda CONFIG: [DATA_DIR / "raw"],
+        outputs=lambda CONFIG: [DATA_DIR / CONFIG["rhyme_index"]["path"]],
+        code=["src/rhyme_index"],
+    ),
+    Stage(
+        name="serve",
+        module="src.inference_server.main_inference_server",
+        config_sections=[],
+        inputs=lambda CONFIG: [],
+        outputs=lambda CONFIG: [],
+        code=[],
+        cacheable=False,
+    ),
+]
+
+SHARED_CODE = ["src/utils", "src/paths.py"]
+
+
+def iter_files(path: Path):
+    if path.is_dir():
+        for root, _, files in sorted(os.walk(path)):
+            for file_name in sorted(files):
+                yield Path(root) / file_name
+    elif path.exists():
+        yield path
+
+
+def get_fingerprint(stage: Stage, CONFIG: Dict) -> str:
+    """Hashes what a stage run depends on: its configuration sections, the size and modification
+    time of its inputs and the content of its source files.
+
+    Args:
+    stage (Stage): the stage.
+    CONFIG (dict): the 'main.yml' configuration.
+
+    Returns:
+    str: the stage fingerprint.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps({section: CONFIG.get(section) for section in stage.config_sections}, sort_keys=True, default=str).encode("utf-8"))
+
+    for input_path in stage.inputs(CONFIG):
+        for file_path in iter_files(input_path):
+            stat = file_path.stat()
+            digest.update(f"{file_path}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+
+    for code_path in stage.code + SHARED_CODE:
+        for file_path in iter_files(PARENT_DIR / code_path):
+            if file_path.suffix == ".py":
+                digest.update(file_path.read_bytes())
+
+    return digest.hexdigest()
+
+
+def is_up_to_date(stage: Stage, CONFIG: Dict, fingerprint: str) -> bool:
+    state_path = STAGES_STATE_DIR / f"{stage.name}.json"
+    if not stage.cacheable or not state_path.exists():
+        return False
+
+    with open(state_path, encoding="utf-8") as f:
+        state = json.load(f)
+
+    return state["fingerprint"] == fingerprint and all(Path(output).exists() for output in stage.outputs(CONFIG))
+
+
+def record_run(stage: Stage, CONFIG: Dict, fingerprint: str) -> None:
+    os.makedirs(STAGES_STATE_DIR, exist_ok=True)
+    state = {"fingerprint": fingerprint, "outputs": [str(output) for output in stage.outputs(CONFIG)]}
+    with open(STAGES_STATE_DIR / f"{stage.name}.json", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+
+
+def run_stage(stage: Stage, CONFIG: Dict, force: bool = False) -> bool:
+    """Runs a stage unless its inputs, configuration sections and code did not change since its
+    last recorded run and its outputs still exist.
+
+    Args:
+    stage (Stage): the stage to run.
+    CONFIG (dict): the 'main.yml' configuration, parsed once for all the stages.
+    force (bool): runs the stage even when it is up to date.
+
+    Returns:
+    bool: True when the stage ran, False when it was skipped.
+    """
+    fingerprint = get_fingerprint(stage, CONFIG) if stage.cacheable else None
+
+    if not force and is_up_to_date(stage, CONFIG, fingerprint):
+        logger.info(f"Stage {stage.name} is up to date, skipping")
+        return False
+
+    logger.info(f"Running stage {stage.name}")
+    importlib.import_module(stage.module).main(CONFIG)
+    get_metrics().flush()
+
+    if stage.cacheable:
+        # the stage may have changed its inputs (e.g. discover updates main.yml)
+        record_run(stage, CONFIG, get_fingerprint(stage, CONFIG))
+
+    return True
@@ -0,0 +1,88 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("langchain_core")
+
+from src.benchmarks.utils.standins_utils import ByteTokenizer, get_tiny_llm
+from src.inference_server.utils.kv_cache_utils import PrefixKVCache, prefill_with_cache
+from src.inference_server.utils.batching_utils import GenerationRequest, generate_batch, get_prefix_lengths
+
+TEMPLATE_PREFIX = "Tu es un ghost writer de rap français.\nContexte : "
+GENERATION_PARAMS = {"temperature": 1.0, "top_p": 1.0, "do_sample": False, "repetition_penalty": 1.0}
+MAX_NEW_TOKENS = 8
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    return ByteTokenizer()
+
+
+@pytest.fixture(scope="module")
+def model(tokenizer):
+    return get_tiny_llm(tokenizer.vocab_size, seed=0)
+
+
+def make_request(tokenizer, context: str, question: str, cacheable: bool = True) -> GenerationRequest:
+    context_prefix = f"{TEMPLATE_PREFIX}{context}\nQuestion : "
+    encoding = tokenizer(f"{context_prefix}{question}", return_offsets_mapping=True)
+    prefix_lengths = get_prefix_lengths(encoding["offset_mapping"], [TEMPLATE_PREFIX, context_prefix]) if cacheable else []
+    return GenerationRequest(encoding["input_ids"], MAX_NEW_TOKENS, prefix_lengths)
+
+
+def make_batch(tokenizer):
+    return [
+        # the context prefix is cached by the warm up batch
+        make_request(tokenizer, "Le soleil sur Marseille, la mer et le béton.", "Un couplet joyeux ?"),
+        # only the template prefix is cached, with a longer prompt
+        make_request(tokenizer, "La nuit tombe sur le quartier, les sirènes au loin, personne ne dort.", "Un refrain sombre sur la ville ?"),
+        # never cached
+        make_request(tokenizer, "Court.", "Une rime ?", cacheable=False),
+        # the context prefix is cached, with a shorter question
+        make_request(tokenizer, "J'ai grandi dans la fouille", "Rimes ?"),
+    ]
+
+
+def warm_up(model, tokenizer, kv_cache):
+    generate_batch(model, tokenizer, [
+        make_request(tokenizer, "Le soleil sur Marseille, la mer et le béton.", "Une intro ?"),
+        make_request(tokenizer, "J'ai grandi dans la fouille", "Un couplet triste sur l'enfance et la rue ?"),
+    ], GENERATION_PARAMS, kv_cache=kv_cache)
+
+
+def get_outputs(requests):
+    return [("".join(request.stream(timeout=1)), request.nb_generated_tokens) for request in requests]
+
+
+@torch.inference_mode()
+def test_prefill_with_cache_logits(model, tokenizer):
+    kv_cache = PrefixKVCache(max_memory_mb=64)
+    warm_up(model, tokenizer, kv_cache)
+
+    requests = make_batch(tokenizer)
+    logits, _, attention_mask, position_ids, cached_lengths = prefill_with_cache(model, requests, kv_cache, tokenizer.pad_token_id)
+
+    assert cached_lengths[0] > len(tokenizer(TEMPLATE_PREFIX)["input_ids"])
+    assert 0 < cached_lengths[1] <= len(tokenizer(TEMPLATE_PREFIX)["input_ids"])
+    assert cached_lengths[2] == 0
+    assert cached_lengths[3] > 0
+
+    for row, request in enumerate(requests):
+        expected = model(input_ids=torch.tensor([request.prompt_ids])).logits[0, -1]
+        torch.testing.assert_close(logits[row], expected, atol=1e-4, rtol=1e-4)
+        assert position_ids[row, 0].item() == len(request.prompt_ids) - 1
+        assert attention_mask[row].sum().item() == len(request.prompt_ids)
+
+
+def test_generate_batch_with_warm_cache(model, tokenizer):
+    requests = make_batch(tokenizer)
+    generate_batch(model, tokenizer, requests, GENERATION_PARAMS)
+    expected_outputs = get_outputs(requests)
+
+    kv_cache = PrefixKVCache(max_memory_mb=64)
+    warm_up(model, tokenizer, kv_cache)
+    requests = make_batch(tokenizer)
+    generate_batch(model, tokenizer, requests, GENERATION_PARAMS, kv_cache=kv_cache)
+
+    assert get_outputs(requests) == expected_outputs
+    assert kv_cache.get_stats()["hit_rate"] > 0
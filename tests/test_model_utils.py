@@ -0,0 +1,36 @@
+import copy
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from src.utils.file_utils import get_config
+from src.inference_server.utils.model_utils import get_model_and_tokenizer, get_generation_params
+from src.inference_server.utils.batching_utils import GenerationRequest, generate_batch
+
+
+@pytest.fixture(scope="module")
+def cpu_config():
+    CONFIG = copy.deepcopy(get_config("main.yml"))
+    CONFIG["model"]["backend"] = "cpu"
+    CONFIG["model"]["use_small_model"] = True
+    CONFIG["model"]["cpu"]["quantization"] = "int8"
+    CONFIG["model"]["max_new_tokens"] = 8
+    CONFIG["model"]["do_sample"] = False
+    return CONFIG
+
+
+def test_cpu_small_model_generates(cpu_config):
+    try:
+        model, tokenizer = get_model_and_tokenizer(cpu_config)
+    except OSError as e:
+        pytest.skip(f"{cpu_config['model']['small_model_name']} is not available: {e}")
+
+    generation_params = get_generation_params(cpu_config)
+    request = GenerationRequest(tokenizer("Écris une rime en -ouille")["input_ids"], generation_params["max_new_tokens"])
+    generate_batch(model, tokenizer, [request], generation_params)
+
+    text = "".join(request.stream(timeout=1))
+    assert 0 < request.nb_generated_tokens <= generation_params["max_new_tokens"]
+    assert isinstance(text, str)
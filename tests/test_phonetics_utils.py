@@ -0,0 +1,48 @@
+import pytest
+
+from src.rhyme_index.utils.phonetics_utils import to_phonemes, get_rhyme_keys, get_last_word
+
+
+@pytest.mark.parametrize("word, phonemes", [
+    ("belle", "bEl"),
+    ("elle", "El"),
+    ("terre", "tEr"),
+    ("guerre", "gEr"),
+    ("cette", "sEt"),
+    ("ciel", "siEl"),
+    ("frère", "frEr"),
+    ("bête", "bEt"),
+    ("grenouille", "gr@nuj"),
+    ("bonne", "bon"),
+    ("bon", "bO"),
+    ("chats", "Sa"),
+    ("grand", "grA"),
+    ("toujours", "tuZur"),
+])
+def test_to_phonemes(word, phonemes):
+    assert to_phonemes(word) == phonemes
+
+
+@pytest.mark.parametrize("words", [
+    ["belle", "elle", "ciel", "fraternel"],
+    ["terre", "guerre", "frère"],
+    ["cette", "bête"],
+    ["grenouille", "fouille", "magouille", "ouille"],
+    ["amour", "toujours", "l'amour"],
+    ["soleil", "Marseille", "pareil"],
+])
+def test_get_rhyme_keys_rhyming_words(words):
+    assert len({get_rhyme_keys(word) for word in words}) == 1
+
+
+@pytest.mark.parametrize("word", ["le", "je", "que", "me", "te", "les", "des", "mes"])
+def test_get_rhyme_keys_short_words(word):
+    rime, assonance = get_rhyme_keys(word)
+
+    assert rime and assonance
+
+
+def test_get_last_word():
+    assert get_last_word("On fait les grenouilles (ouais ouais)") == "grenouilles"
+    assert get_last_word("J'te donne tout l'amour") == "amour"
+    assert get_last_word("...") is None
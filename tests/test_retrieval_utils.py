@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("langchain")
+pytest.importorskip("langchain_community")
+pytest.importorskip("qdrant_client")
+
+from src.inference_server.utils.retrieval_utils import extract_artists
+
+ARTISTS_NAMES = ["Jul", "Sniper", "UZI", "Django", "Souffrance", "113", "X-Men", "Kalash", "Kalash Criminel", "La Clinique", "Fresh La Douille"]
+AMBIGUOUS_NAMES = ["La Clinique"]
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("Écris un couplet à la manière de Jul", ["Jul"]),
+    ("un son de SNIPER sur la banlieue", ["Sniper"]),
+    ("un texte comme Uzi", ["UZI"]),
+    ("Un couplet triste de Souffrance", ["Souffrance"]),
+    ("un texte sur la souffrance et la rue", []),
+    ("un sniper sur le toit", []),
+    ("un freestyle de django", []),
+    ("le flow du 113", ["113"]),
+    ("un son des X-MEN", ["X-Men"]),
+    ("comme kalash criminel", ["Kalash Criminel"]),
+    ("fresh la douille et Kalash", ["Fresh La Douille", "Kalash"]),
+    ("un couplet de La Clinique", ["La Clinique"]),
+    ("il sort de la clinique", []),
+])
+def test_extract_artists(prompt, expected):
+    assert sorted(extract_artists(prompt, ARTISTS_NAMES, AMBIGUOUS_NAMES)) == sorted(expected)
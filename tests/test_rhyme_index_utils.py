@@ -0,0 +1,64 @@
+import pytest
+
+from src.rhyme_index.utils.rhyme_index_utils import RhymeIndex, get_rhyme_entries, write_rhyme_index, parse_rhyme_query
+
+SONGS = [
+    {"artist_name": "Jul", "song_name": "a", "verses": ["J'suis dans la fouille\nOn fait les grenouilles (ouais)"], "chorus": ["Le soleil sur Marseille\nLa nuit c'est pareil"]},
+    {"artist_name": "Jul", "song_name": "b", "verses": ["Encore une magouille\nToujours dans la fouille"]},
+    {"artist_name": "Booba", "song_name": "c", "lyrics": "Il me faut des nouilles\nElle est belle\nSous le ciel"},
+]
+
+
+@pytest.fixture
+def rhyme_index(tmp_path):
+    path = tmp_path / "rhyme_index.bin"
+    write_rhyme_index(get_rhyme_entries(SONGS, {"Jul": "JuL"}), str(path))
+    index = RhymeIndex(str(path))
+    yield index
+    index.close()
+
+
+def test_query(rhyme_index):
+    results = rhyme_index.query("-ouille")
+
+    assert [result["word"] for result in results] == ["fouille", "grenouilles", "magouille", "nouilles"]
+    assert results[0]["count"] == 2
+
+
+def test_query_artists(rhyme_index):
+    results = rhyme_index.query("ouille", ["JuL"])
+
+    assert {result["word"] for result in results} == {"fouille", "grenouilles", "magouille"}
+    assert all(example["artist_name"] == "JuL" for result in results for example in result["examples"])
+    assert rhyme_index.query("ouille", ["Unknown"]) == []
+
+
+def test_query_open_e(rhyme_index):
+    assert {result["word"] for result in rhyme_index.query("-elle")} == {"belle", "ciel"}
+
+
+def test_query_assonance_fallback(rhyme_index):
+    # no "-ouche" word, the words with the "ou" vowel sound are returned
+    assert {result["word"] for result in rhyme_index.query("bouche")} == {"fouille", "grenouilles", "magouille", "nouilles"}
+
+
+def test_query_limit_and_examples(rhyme_index):
+    results = rhyme_index.query("ouille", limit=2, max_examples=1)
+
+    assert len(results) == 2
+    assert all(len(result["examples"]) == 1 for result in results)
+
+
+@pytest.mark.parametrize("prompt, target", [
+    ("rimes en -ouille pour Jul", "ouille"),
+    ("des rimes avec grenouille", "grenouille"),
+    ("un couplet qui rime avec la nuit", "nuit"),
+    ("rimes avec les étoiles", "étoiles"),
+    ("qui riment avec « béton »", "béton"),
+    ("rimes sur -age", "age"),
+    ("rimes sur le thème de la rue", None),
+    ("rime avec la", None),
+    ("écris un couplet triste", None),
+])
+def test_parse_rhyme_query(prompt, target):
+    assert parse_rhyme_query(prompt) == target